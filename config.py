@@ -37,6 +37,16 @@ BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
 DRY_RUN = os.getenv("DRY_RUN", "False").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+# Connection pool settings (async engines) - pool size should roughly match concurrency
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+MIGRATION_CONCURRENCY = int(os.getenv("MIGRATION_CONCURRENCY", "50"))
+# Prepared statements kept per pooled connection, so repeated queries skip parse/plan
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "500"))
+
+# Bulk user batches at least this large are loaded with COPY instead of INSERTs
+BULK_COPY_THRESHOLD = int(os.getenv("BULK_COPY_THRESHOLD", "100"))
+
 # Migration order - defines the sequence of migration
 MIGRATION_ORDER = [
     "schools",
@@ -4,16 +4,21 @@ Database utilities for connecting to V1 and V2 databases
 
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, AsyncIterator
 import pandas as pd
 from sqlalchemy import create_engine, text, MetaData
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
-from config import V1_DB_CONFIG, V2_DB_CONFIG
+from config import V1_DB_CONFIG, V2_DB_CONFIG, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_PREPARED_STATEMENT_CACHE_SIZE
 
 logger = logging.getLogger(__name__)
 
+# (engine_version, connection) of the transaction() open in the current task, if any
+_current_transaction: ContextVar[Optional[tuple]] = ContextVar("current_transaction", default=None)
+
 
 class DatabaseManager:
     """Manages connections to both V1 and V2 databases"""
@@ -51,7 +56,13 @@ class DatabaseManager:
         """Connect to V1 database asynchronously"""
         if not self.v1_async_engine:
             connection_string = self.get_connection_string(V1_DB_CONFIG, async_driver=True)
-            self.v1_async_engine = create_async_engine(connection_string, pool_pre_ping=True)
+            self.v1_async_engine = create_async_engine(
+                connection_string,
+                pool_pre_ping=True,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                connect_args={"prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE}
+            )
             logger.info("Connected to V1 database (async)")
         return self.v1_async_engine
     
@@ -59,7 +70,13 @@ class DatabaseManager:
         """Connect to V2 database asynchronously"""
         if not self.v2_async_engine:
             connection_string = self.get_connection_string(V2_DB_CONFIG, async_driver=True)
-            self.v2_async_engine = create_async_engine(connection_string, pool_pre_ping=True)
+            self.v2_async_engine = create_async_engine(
+                connection_string,
+                pool_pre_ping=True,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                connect_args={"prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE}
+            )
             logger.info("Connected to V2 database (async)")
         return self.v2_async_engine
     
@@ -113,11 +130,37 @@ class DatabaseManager:
             logger.error(f"Error reading table {table_name}: {e}")
             return pd.DataFrame()
     
-    async def execute_query(self, query: str, params: Optional[Dict] = None, engine_version: str = "v2") -> List[Dict]:
-        """Execute a query and return results"""
+    @asynccontextmanager
+    async def transaction(self, engine_version: str = "v2") -> AsyncIterator[Any]:
+        """Run the enclosed db_manager calls on one connection and commit them together
+        
+        Statements share the connection, so they must not be issued concurrently.
+        """
+        engine = await self.connect_v2_async() if engine_version == "v2" else await self.connect_v1_async()
+        
+        async with engine.begin() as conn:
+            token = _current_transaction.set((engine_version, conn))
+            try:
+                yield conn
+            finally:
+                _current_transaction.reset(token)
+    
+    @asynccontextmanager
+    async def _begin(self, engine_version: str) -> AsyncIterator[Any]:
+        """Join the open transaction() for engine_version, or begin a new one"""
+        current = _current_transaction.get()
+        if current and current[0] == engine_version:
+            yield current[1]
+            return
+        
         engine = await self.connect_v2_async() if engine_version == "v2" else await self.connect_v1_async()
         
         async with engine.begin() as conn:
+            yield conn
+    
+    async def execute_query(self, query: str, params: Optional[Dict] = None, engine_version: str = "v2") -> List[Dict]:
+        """Execute a query and return results"""
+        async with self._begin(engine_version) as conn:
             if params:
                 result = await conn.execute(text(query), params)
             else:
@@ -128,10 +171,26 @@ class DatabaseManager:
             
             return [dict(zip(columns, row)) for row in rows]
     
-    async def insert_record(self, table_name: str, data: Dict[str, Any], engine_version: str = "v2") -> Optional[int]:
-        """Insert a single record and return the ID if available"""
+    async def stream_query(self, query: str, params: Optional[Dict] = None, engine_version: str = "v2",
+                           chunk_size: int = 1000) -> AsyncIterator[Dict]:
+        """Stream query results through a server-side cursor, fetching chunk_size rows at a time"""
         engine = await self.connect_v2_async() if engine_version == "v2" else await self.connect_v1_async()
         
+        async with engine.connect() as conn:
+            result = await conn.stream(text(query).execution_options(yield_per=chunk_size), params or {})
+            columns = result.keys()
+            
+            async for row in result:
+                yield dict(zip(columns, row))
+    
+    async def fetch_value(self, query: str, params: Optional[Dict] = None, engine_version: str = "v2") -> Any:
+        """Execute a query and return the first column of the first row"""
+        async with self._begin(engine_version) as conn:
+            result = await conn.execute(text(query), params or {})
+            return result.scalar()
+    
+    async def insert_record(self, table_name: str, data: Dict[str, Any], engine_version: str = "v2") -> Optional[int]:
+        """Insert a single record and return the ID if available"""
         columns = ", ".join(data.keys())
         placeholders = ", ".join(f":{key}" for key in data.keys())
         
@@ -142,7 +201,7 @@ class DatabaseManager:
         """
         
         try:
-            async with engine.begin() as conn:
+            async with self._begin(engine_version) as conn:
                 result = await conn.execute(text(query), data)
                 record_id = result.fetchone()
                 if record_id:
@@ -153,6 +212,41 @@ class DatabaseManager:
             logger.error(f"Data: {data}")
             raise
     
+    async def insert_records(self, table_name: str, records: List[Dict[str, Any]], returning: str = "id",
+                             on_conflict: Optional[str] = None, engine_version: str = "v2") -> List[Dict[str, Any]]:
+        """Insert records with one multi-row INSERT and return the RETURNING rows
+        
+        on_conflict is appended after ON CONFLICT, e.g. "(id) DO NOTHING".
+        """
+        if not records:
+            return []
+            
+        # All records must share the first record's columns; bind names are numbered per row
+        keys = list(records[0].keys())
+        columns = ", ".join(keys)
+        values = ", ".join(
+            "(" + ", ".join(f":{key}_{row}" for key in keys) + ")"
+            for row in range(len(records))
+        )
+        params = {f"{key}_{row}": record[key] for row, record in enumerate(records) for key in keys}
+        
+        conflict_clause = f"ON CONFLICT {on_conflict}" if on_conflict else ""
+        query = f"""
+            INSERT INTO {table_name} ({columns}) 
+            VALUES {values} 
+            {conflict_clause}
+            RETURNING {returning}
+        """
+        
+        try:
+            async with self._begin(engine_version) as conn:
+                result = await conn.execute(text(query), params)
+                columns = result.keys()
+                return [dict(zip(columns, row)) for row in result.fetchall()]
+        except Exception as e:
+            logger.error(f"Error inserting {len(records)} records into {table_name}: {e}")
+            raise
+    
     async def bulk_insert(self, table_name: str, records: List[Dict[str, Any]], engine_version: str = "v2"):
         """Insert multiple records in bulk"""
         if not records:
@@ -173,6 +267,33 @@ class DatabaseManager:
             logger.error(f"Error bulk inserting into {table_name}: {e}")
             raise
     
+    async def reserve_ids(self, table_name: str, count: int, engine_version: str = "v2") -> List[int]:
+        """Reserve IDs from a table's serial sequence so rows can be loaded with explicit IDs"""
+        rows = await self.execute_query(
+            "SELECT nextval(pg_get_serial_sequence(:table_name, 'id')) AS id FROM generate_series(1, :count)",
+            {"table_name": table_name, "count": count},
+            engine_version=engine_version
+        )
+        return [row['id'] for row in rows]
+    
+    async def copy_records(self, table_name: str, columns: List[str], records: List[tuple], engine_version: str = "v2"):
+        """Load records with PostgreSQL COPY, bypassing per-row INSERT parsing"""
+        if not records:
+            return
+            
+        engine = await self.connect_v2_async() if engine_version == "v2" else await self.connect_v1_async()
+        
+        try:
+            async with engine.begin() as conn:
+                raw_connection = await conn.get_raw_connection()
+                await raw_connection.driver_connection.copy_records_to_table(
+                    table_name, records=records, columns=columns
+                )
+            logger.info(f"Copied {len(records)} records into {table_name}")
+        except Exception as e:
+            logger.error(f"Error copying records into {table_name}: {e}")
+            raise
+    
     def close_connections(self):
         """Close all database connections"""
         if self.v1_engine:
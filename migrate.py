@@ -152,6 +152,9 @@ class MigrationRunner:
         
         # Step 1: Migrate Schools
         if not self.dry_run:
+            # Preload existing V2 contacts so new emails/phones skip per-user uniqueness lookups
+            await user_manager.warm_contact_cache()
+            
             logger.info("=== MIGRATING SCHOOLS ===")
             school_result = await school_migrator.migrate_schools()
             self._log_migration_step("schools", school_result)
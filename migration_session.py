@@ -61,6 +61,7 @@ class MigrationSession:
         
         # Entity mappings (V1 ID -> V2 ID)
         self.school_mappings: Dict[int, MigrationMapping] = {}
+        self.school_mappings_by_v2_id: Dict[int, MigrationMapping] = {}  # reverse index of school_mappings
         self.teacher_mappings: Dict[int, MigrationMapping] = {}
         self.parent_mappings: Dict[int, MigrationMapping] = {}
         self.student_mappings: Dict[int, MigrationMapping] = {}
@@ -129,6 +130,7 @@ class MigrationSession:
         )
         
         self.school_mappings[v1_id] = mapping
+        self.school_mappings_by_v2_id[v2_id] = mapping
         self.school_teachers[v2_id] = set()
         self.school_parents[v2_id] = set()
         self.school_students[v2_id] = set()
@@ -253,23 +255,32 @@ class MigrationSession:
     
     def validate_school_exists(self, v2_school_id: int) -> bool:
         """Validate that a school exists in the migration session"""
-        for mapping in self.school_mappings.values():
-            if mapping.v2_id == v2_school_id:
-                return True
-        return False
+        return v2_school_id in self.school_mappings_by_v2_id
     
     def get_school_info(self, v2_school_id: int) -> Optional[Dict[str, Any]]:
         """Get school information by V2 school ID"""
-        for mapping in self.school_mappings.values():
-            if mapping.v2_id == v2_school_id:
-                return {
-                    "v1_id": mapping.v1_id,
-                    "v2_id": mapping.v2_id,
-                    "name": mapping.metadata.get("name", ""),
-                    "code": mapping.metadata.get("code", ""),
-                    "created_at": mapping.created_at
-                }
-        return None
+        mapping = self.school_mappings_by_v2_id.get(v2_school_id)
+        if not mapping:
+            return None
+        
+        return {
+            "v1_id": mapping.v1_id,
+            "v2_id": mapping.v2_id,
+            "name": mapping.metadata.get("name", ""),
+            "code": mapping.metadata.get("code", ""),
+            "created_at": mapping.created_at
+        }
+    
+    def find_orphaned_mappings(self, mappings: Dict[Any, MigrationMapping]) -> List[MigrationMapping]:
+        """Mappings whose school is not among the migrated V2 schools"""
+        # Diff the distinct school IDs against the index first; most runs have no orphans at all
+        orphan_school_ids = {mapping.school_id for mapping in mappings.values()}.difference(
+            self.school_mappings_by_v2_id
+        )
+        if not orphan_school_ids:
+            return []
+        
+        return [mapping for mapping in mappings.values() if mapping.school_id in orphan_school_ids]
     
     def add_teacher_mapping(self, v1_id: int, v2_user_id: int, v2_school_id: int, 
                           teacher_data: Dict[str, Any]) -> bool:
@@ -439,11 +450,7 @@ class MigrationSession:
         }
         
         for v2_school_id, curriculum_mapping in self.school_curriculums.items():
-            school_mapping = None
-            for mapping in self.school_mappings.values():
-                if mapping.v2_id == v2_school_id:
-                    school_mapping = mapping
-                    break
+            school_mapping = self.school_mappings_by_v2_id.get(v2_school_id)
             
             if not school_mapping:
                 error = f"School ID {v2_school_id} has curriculum but no school mapping"
@@ -506,11 +513,7 @@ class MigrationSession:
         }
         
         for v2_school_id, curriculum_mapping in self.school_curriculums.items():
-            school_mapping = None
-            for mapping in self.school_mappings.values():
-                if mapping.v2_id == v2_school_id:
-                    school_mapping = mapping
-                    break
+            school_mapping = self.school_mappings_by_v2_id.get(v2_school_id)
             
             if not school_mapping:
                 error = f"School ID {v2_school_id} has curriculum but no school mapping"
@@ -6,8 +6,11 @@ Creates User records and Parent records for each V1 parent
 import logging
 from typing import Dict, Any, List, Optional
 
+from config import MIGRATION_CONCURRENCY
 from db_utils import db_manager
-from user_utils import user_manager
+from user_utils import user_manager, UserType
+from utils import gather_with_concurrency
+from validation_utils import map_parent_type
 from migration_session import get_migration_session, MigrationPhase
 from migrators.school_migrator import school_migrator
 
@@ -42,15 +45,40 @@ class ParentMigrator:
             
             session.stats["parents"]["total"] = len(v1_parents)
             
-            # Migrate each parent
+            # Resolve each parent's V2 school before creating any users
+            parents_by_school: Dict[int, List[Dict[str, Any]]] = {}
             for parent in v1_parents:
-                success = await self._migrate_single_parent(parent)
-                if success:
-                    self.migrated_count += 1
+                v2_school_id = self._resolve_v2_school_id(parent)
+                if v2_school_id:
+                    parents_by_school.setdefault(v2_school_id, []).append(parent)
                 else:
                     self.failed_count += 1
                     session.stats["parents"]["failed"] += 1
             
+            # Create users per school in bulk, then the parent records concurrently
+            for v2_school_id, parents in parents_by_school.items():
+                try:
+                    user_ids = await user_manager.create_many(parents, UserType.PARENT, v2_school_id)
+                except Exception as e:
+                    # Only this school's parents fail; move on to the next school
+                    logger.error(f"Error creating parent users for school {v2_school_id}: {e}")
+                    self.failed_count += len(parents)
+                    session.stats["parents"]["failed"] += len(parents)
+                    continue
+                
+                results = await gather_with_concurrency(
+                    (self._create_parent_record(parent, user_id, v2_school_id)
+                     for parent, user_id in zip(parents, user_ids)),
+                    MIGRATION_CONCURRENCY
+                )
+                
+                for success in results:
+                    if success:
+                        self.migrated_count += 1
+                    else:
+                        self.failed_count += 1
+                        session.stats["parents"]["failed"] += 1
+            
             result = {
                 "success": True,
                 "migrated": self.migrated_count,
@@ -81,8 +109,8 @@ class ParentMigrator:
         
         return await db_manager.execute_query(query, engine_version="v1")
     
-    async def _migrate_single_parent(self, v1_parent: Dict[str, Any]) -> bool:
-        """Migrate a single parent from V1 to V2 with strict school validation"""
+    def _resolve_v2_school_id(self, v1_parent: Dict[str, Any]) -> Optional[int]:
+        """Resolve a V1 parent's V2 school ID with strict school validation"""
         try:
             session = get_migration_session()
             
@@ -90,11 +118,11 @@ class ParentMigrator:
             v1_school_id = v1_parent.get('schoolid')
             if not v1_school_id:
                 logger.error(f"Parent {v1_parent.get('firstname', '')} {v1_parent.get('lastname', '')} has no school ID")
-                return False
+                return None
             
             # Validate the V1 school was successfully migrated
             if session and not session.validate_v1_school_reference(v1_school_id, "parent", v1_parent):
-                return False
+                return None
             
             # Get V2 school ID from session (more reliable than direct migrator call)
             if session:
@@ -108,25 +136,32 @@ class ParentMigrator:
                 logger.error(error_msg)
                 if session:
                     session.validation_errors.append(error_msg)
-                return False
+                return None
             
             # Verify school exists in session
             if session and not session.validate_school_exists(v2_school_id):
                 error_msg = f"V2 School ID {v2_school_id} does not exist in migration session for parent {v1_parent.get('firstname', '')} {v1_parent.get('lastname', '')}"
                 logger.error(error_msg)
-                return False
+                return None
             
-            # Log school assignment for audit trail
+            return v2_school_id
+            
+        except Exception as e:
+            logger.error(f"Error resolving school for parent {v1_parent.get('firstname', '')} {v1_parent.get('lastname', '')}: {e}")
+            return None
+    
+    async def _create_parent_record(self, v1_parent: Dict[str, Any], user_id: Optional[int],
+                                    v2_school_id: int) -> bool:
+        """Create the V2 parent record for an already created parent user"""
+        try:
+            session = get_migration_session()
             school_info = session.get_school_info(v2_school_id) if session else None
-            logger.info(f"Migrating parent {v1_parent.get('firstname', '')} {v1_parent.get('lastname', '')} to school: {school_info.get('name', 'Unknown') if school_info else 'Unknown'} (V2 ID: {v2_school_id})")
             
-            # Step 1: Create User record
-            user_id = await user_manager.create_parent_user(v1_parent, v2_school_id)
             if not user_id:
                 logger.error(f"Failed to create user for parent: {v1_parent['firstname']} {v1_parent['lastname']}")
                 return False
             
-            # Step 2: Create Parent record
+            # Create Parent record
             parent_data = {
                 "user_id": user_id,
                 "occupation": None,  # V1 doesn't have occupation
@@ -160,17 +195,7 @@ class ParentMigrator:
     
     def _map_parent_type(self, relationship: Optional[str]) -> str:
         """Map V1 relationship to V2 parent type"""
-        if not relationship:
-            return "GUARDIAN"
-            
-        relationship_lower = relationship.lower()
-        
-        if "father" in relationship_lower or "dad" in relationship_lower:
-            return "FATHER"
-        elif "mother" in relationship_lower or "mom" in relationship_lower or "mum" in relationship_lower:
-            return "MOTHER"
-        else:
-            return "GUARDIAN"
+        return map_parent_type(relationship)
     
     def get_v2_user_id(self, v1_parent_id: str) -> Optional[int]:
         """Get V2 user ID from V1 parent ID"""
@@ -291,9 +291,9 @@ class SchoolMigrator:
         
         validated_schools = []
         
-        for v1_school in v1_schools:
-            validation_result = enhanced_validator.validate_v1_school(v1_school)
-            
+        validation_results = enhanced_validator.validate_v1_schools_batch(v1_schools)
+        
+        for v1_school, validation_result in zip(v1_schools, validation_results):
             # Collect validation issues
             self.validation_errors.extend([
                 f"School {v1_school.get('schoolName', 'Unknown')}: {error}" 
@@ -306,7 +306,10 @@ class SchoolMigrator:
             
             if validation_result.is_valid:
                 # Use corrected data for migration
-                validated_schools.append(validation_result.corrected_data)
+                if validation_result.corrected_data is not None:
+                    validated_schools.append({**v1_school, **validation_result.corrected_data})
+                else:
+                    validated_schools.append(v1_school)
                 logger.info(f"Validated school: {v1_school.get('schoolName')}")
             else:
                 logger.error(
@@ -3,12 +3,15 @@ Student migration from V1 to V2 schema
 Creates User records, Student records, and StudentParent relationships
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, date
 
+from config import MIGRATION_CONCURRENCY
 from db_utils import db_manager
-from user_utils import user_manager
+from user_utils import user_manager, UserType
+from utils import gather_with_concurrency
 from migration_session import get_migration_session, MigrationPhase
 from migrators.school_migrator import school_migrator
 from migrators.parent_migrator import parent_migrator
@@ -24,6 +27,9 @@ class StudentMigrator:
         self.migrated_count = 0
         self.failed_count = 0
         self.student_parent_relationships = []
+        self._school_class_ids: Dict[Tuple[int, Optional[str]], int] = {}  # (V2 school, V1 class) -> school class ID
+        self._school_class_lock: Optional[asyncio.Lock] = None
+        self._started_at: Optional[datetime] = None  # Clock snapshot shared by every student in a run
         
     async def migrate_students(self) -> Dict[str, Any]:
         """Main method to migrate all students"""
@@ -45,15 +51,44 @@ class StudentMigrator:
             
             session.stats["students"]["total"] = len(v1_students)
             
-            # Migrate each student
+            # Concurrent students share default classes; serialize their creation
+            self._school_class_lock = asyncio.Lock()
+            self._started_at = datetime.now()
+            
+            # Resolve each student's V2 school before creating any users
+            students_by_school: Dict[int, List[Dict[str, Any]]] = {}
             for student in v1_students:
-                success = await self._migrate_single_student(student)
-                if success:
-                    self.migrated_count += 1
+                v2_school_id = self._resolve_v2_school_id(student)
+                if v2_school_id:
+                    students_by_school.setdefault(v2_school_id, []).append(student)
                 else:
                     self.failed_count += 1
                     session.stats["students"]["failed"] += 1
             
+            # Create users per school in bulk, then the student records concurrently
+            for v2_school_id, students in students_by_school.items():
+                try:
+                    user_ids = await user_manager.create_many(students, UserType.STUDENT, v2_school_id)
+                except Exception as e:
+                    # Only this school's students fail; move on to the next school
+                    logger.error(f"Error creating student users for school {v2_school_id}: {e}")
+                    self.failed_count += len(students)
+                    session.stats["students"]["failed"] += len(students)
+                    continue
+                
+                results = await gather_with_concurrency(
+                    (self._create_student_record(student, user_id, v2_school_id)
+                     for student, user_id in zip(students, user_ids)),
+                    MIGRATION_CONCURRENCY
+                )
+                
+                for success in results:
+                    if success:
+                        self.migrated_count += 1
+                    else:
+                        self.failed_count += 1
+                        session.stats["students"]["failed"] += 1
+            
             # Create student-parent relationships
             await self._create_student_parent_relationships()
             
@@ -87,8 +122,8 @@ class StudentMigrator:
         
         return await db_manager.execute_query(query, engine_version="v1")
     
-    async def _migrate_single_student(self, v1_student: Dict[str, Any]) -> bool:
-        """Migrate a single student from V1 to V2 with strict school validation"""
+    def _resolve_v2_school_id(self, v1_student: Dict[str, Any]) -> Optional[int]:
+        """Resolve a V1 student's V2 school ID with strict school validation"""
         try:
             session = get_migration_session()
             
@@ -96,11 +131,11 @@ class StudentMigrator:
             v1_school_id = v1_student.get('schoolid')
             if not v1_school_id:
                 logger.error(f"Student {v1_student.get('firstname', '')} {v1_student.get('lastname', '')} has no school ID")
-                return False
+                return None
             
             # Validate the V1 school was successfully migrated
             if session and not session.validate_v1_school_reference(v1_school_id, "student", v1_student):
-                return False
+                return None
             
             # Get V2 school ID from session (more reliable than direct migrator call)
             if session:
@@ -114,28 +149,35 @@ class StudentMigrator:
                 logger.error(error_msg)
                 if session:
                     session.validation_errors.append(error_msg)
-                return False
+                return None
             
             # Verify school exists in session
             if session and not session.validate_school_exists(v2_school_id):
                 error_msg = f"V2 School ID {v2_school_id} does not exist in migration session for student {v1_student.get('firstname', '')} {v1_student.get('lastname', '')}"
                 logger.error(error_msg)
-                return False
+                return None
             
-            # Log school assignment for audit trail
+            return v2_school_id
+            
+        except Exception as e:
+            logger.error(f"Error resolving school for student {v1_student.get('firstname', '')} {v1_student.get('lastname', '')}: {e}")
+            return None
+    
+    async def _create_student_record(self, v1_student: Dict[str, Any], user_id: Optional[int],
+                                     v2_school_id: int) -> bool:
+        """Create the V2 student record for an already created student user"""
+        try:
+            session = get_migration_session()
             school_info = session.get_school_info(v2_school_id) if session else None
-            logger.info(f"Migrating student {v1_student.get('firstname', '')} {v1_student.get('lastname', '')} to school: {school_info.get('name', 'Unknown') if school_info else 'Unknown'} (V2 ID: {v2_school_id})")
             
-            # Step 1: Create User record
-            user_id = await user_manager.create_student_user(v1_student, v2_school_id)
             if not user_id:
                 logger.error(f"Failed to create user for student: {v1_student['firstname']} {v1_student['lastname']}")
                 return False
             
-            # Step 2: Get or create default school class
-            school_class_id = await self._get_or_create_default_school_class(v2_school_id, v1_student.get('classid'))
+            # Get or create default school class
+            school_class_id = await self._get_school_class_id(v2_school_id, v1_student.get('classid'))
             
-            # Step 3: Create Student record
+            # Create Student record
             student_data = {
                 "user_id": user_id,
                 "gender": self._map_gender(v1_student.get('gender')),
@@ -144,7 +186,7 @@ class StudentMigrator:
                 "is_deleted": v1_student.get('isdeleted', False),
                 "is_active": not v1_student.get('isdeleted', False),
                 "is_enrolled": True,
-                "enrollment_date": datetime.now(),  # Use current date as enrollment
+                "enrollment_date": self._started_at or datetime.now(),  # Use migration date as enrollment
                 "school_id": v2_school_id,
                 "school_class_id": school_class_id,
                 "admission_number": v1_student['studentadmissionnumber'],
@@ -182,6 +224,17 @@ class StudentMigrator:
             logger.error(f"Student data: {v1_student}")
             return False
     
+    async def _get_school_class_id(self, v2_school_id: int, v1_class_id: Optional[str]) -> int:
+        """Get the default school class, creating it at most once across concurrent students"""
+        key = (v2_school_id, v1_class_id)
+        
+        if key not in self._school_class_ids:
+            async with self._school_class_lock:
+                if key not in self._school_class_ids:
+                    self._school_class_ids[key] = await self._get_or_create_default_school_class(v2_school_id, v1_class_id)
+        
+        return self._school_class_ids[key]
+    
     async def _get_or_create_default_school_class(self, v2_school_id: int, v1_class_id: Optional[str]) -> int:
         """Get or create a default school class for students"""
         # For now, create a default class for the school
@@ -260,7 +313,7 @@ class StudentMigrator:
         """Estimate date of birth for student (V1 doesn't have this)"""
         # Very rough estimation - assume students are around 10-15 years old
         # This is a placeholder - in real migration you might have better logic
-        current_year = datetime.now().year
+        current_year = (self._started_at or datetime.now()).year
         estimated_birth_year = current_year - 12  # Assume 12 years old
         
         return date(estimated_birth_year, 1, 1)
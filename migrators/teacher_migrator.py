@@ -7,8 +7,10 @@ import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from config import MIGRATION_CONCURRENCY
 from db_utils import db_manager
-from user_utils import user_manager
+from user_utils import user_manager, UserType
+from utils import gather_with_concurrency
 from migration_session import get_migration_session, MigrationPhase
 from migrators.school_migrator import school_migrator
 
@@ -43,15 +45,40 @@ class TeacherMigrator:
             
             session.stats["teachers"]["total"] = len(v1_teachers)
             
-            # Migrate each teacher
+            # Resolve each teacher's V2 school before creating any users
+            teachers_by_school: Dict[int, List[Dict[str, Any]]] = {}
             for teacher in v1_teachers:
-                success = await self._migrate_single_teacher(teacher)
-                if success:
-                    self.migrated_count += 1
+                v2_school_id = self._resolve_v2_school_id(teacher)
+                if v2_school_id:
+                    teachers_by_school.setdefault(v2_school_id, []).append(teacher)
                 else:
                     self.failed_count += 1
                     session.stats["teachers"]["failed"] += 1
             
+            # Create users per school in bulk, then the teacher records concurrently
+            for v2_school_id, teachers in teachers_by_school.items():
+                try:
+                    user_ids = await user_manager.create_many(teachers, UserType.TEACHER, v2_school_id)
+                except Exception as e:
+                    # Only this school's teachers fail; move on to the next school
+                    logger.error(f"Error creating teacher users for school {v2_school_id}: {e}")
+                    self.failed_count += len(teachers)
+                    session.stats["teachers"]["failed"] += len(teachers)
+                    continue
+                
+                results = await gather_with_concurrency(
+                    (self._create_teacher_record(teacher, user_id, v2_school_id)
+                     for teacher, user_id in zip(teachers, user_ids)),
+                    MIGRATION_CONCURRENCY
+                )
+                
+                for success in results:
+                    if success:
+                        self.migrated_count += 1
+                    else:
+                        self.failed_count += 1
+                        session.stats["teachers"]["failed"] += 1
+            
             result = {
                 "success": True,
                 "migrated": self.migrated_count,
@@ -83,8 +110,8 @@ class TeacherMigrator:
         
         return await db_manager.execute_query(query, engine_version="v1")
     
-    async def _migrate_single_teacher(self, v1_teacher: Dict[str, Any]) -> bool:
-        """Migrate a single teacher from V1 to V2 with strict school validation"""
+    def _resolve_v2_school_id(self, v1_teacher: Dict[str, Any]) -> Optional[int]:
+        """Resolve a V1 teacher's V2 school ID with strict school validation"""
         try:
             session = get_migration_session()
             
@@ -92,11 +119,11 @@ class TeacherMigrator:
             v1_school_id = v1_teacher.get('schoolid')
             if not v1_school_id:
                 logger.error(f"Teacher {v1_teacher.get('firstname', '')} {v1_teacher.get('lastname', '')} has no school ID")
-                return False
+                return None
             
             # Validate the V1 school was successfully migrated
             if session and not session.validate_v1_school_reference(v1_school_id, "teacher", v1_teacher):
-                return False
+                return None
             
             # Get V2 school ID from session (more reliable than direct migrator call)
             if session:
@@ -110,25 +137,32 @@ class TeacherMigrator:
                 logger.error(error_msg)
                 if session:
                     session.validation_errors.append(error_msg)
-                return False
+                return None
             
             # Verify school exists in session
             if session and not session.validate_school_exists(v2_school_id):
                 error_msg = f"V2 School ID {v2_school_id} does not exist in migration session for teacher {v1_teacher.get('firstname', '')} {v1_teacher.get('lastname', '')}"
                 logger.error(error_msg)
-                return False
+                return None
             
-            # Log school assignment for audit trail
+            return v2_school_id
+            
+        except Exception as e:
+            logger.error(f"Error resolving school for teacher {v1_teacher.get('firstname', '')} {v1_teacher.get('lastname', '')}: {e}")
+            return None
+    
+    async def _create_teacher_record(self, v1_teacher: Dict[str, Any], user_id: Optional[int],
+                                     v2_school_id: int) -> bool:
+        """Create the V2 teacher record for an already created teacher user"""
+        try:
+            session = get_migration_session()
             school_info = session.get_school_info(v2_school_id) if session else None
-            logger.info(f"Migrating teacher {v1_teacher.get('firstname', '')} {v1_teacher.get('lastname', '')} to school: {school_info.get('name', 'Unknown') if school_info else 'Unknown'} (V2 ID: {v2_school_id})")
             
-            # Step 1: Create User record
-            user_id = await user_manager.create_teacher_user(v1_teacher, v2_school_id)
             if not user_id:
                 logger.error(f"Failed to create user for teacher: {v1_teacher['firstname']} {v1_teacher['lastname']}")
                 return False
             
-            # Step 2: Create Teacher record
+            # Create Teacher record
             teacher_data = {
                 "user_id": user_id,
                 "school_id": v2_school_id,
@@ -157,7 +191,6 @@ class TeacherMigrator:
             
             logger.info(f"Successfully migrated teacher: {v1_teacher['firstname']} {v1_teacher['lastname']} (User ID: {user_id}) to school {school_info.get('name', 'Unknown') if school_info else 'Unknown'}")
             return True
-            return True
                 
         except Exception as e:
             logger.error(f"Error migrating teacher {v1_teacher.get('firstname', '')} {v1_teacher.get('lastname', '')}: {e}")
@@ -4,15 +4,21 @@ Handles the central challenge of creating User records for Teachers, Parents, St
 """
 
 import logging
+import re
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 from enum import Enum
 
 from db_utils import db_manager
-from config import DEFAULT_VALUES
+from config import DEFAULT_VALUES, MIGRATION_CONCURRENCY, BULK_COPY_THRESHOLD
+from utils import DATACLASS_SLOTS, BloomFilter, gather_with_concurrency
 
 logger = logging.getLogger(__name__)
 
+USER_PROGRESS_LOG_INTERVAL = 1000
+
+_NON_DIGIT_RE = re.compile(r'\D+')
+
 
 class UserType(Enum):
     TEACHER = "TEACHER"
@@ -21,7 +27,12 @@ class UserType(Enum):
     SCHOOL_ADMIN = "SCHOOL_ADMIN"
 
 
-@dataclass
+# Enum value strings looked up once instead of through the Enum descriptors per user
+_TYPE_VALUES = {user_type: user_type.value for user_type in UserType}
+_TYPE_LOWER = {user_type: user_type.value.lower() for user_type in UserType}
+
+
+@dataclass(**DATACLASS_SLOTS)
 class UserData:
     """Data structure for user information"""
     first_name: str
@@ -39,6 +50,20 @@ class UserData:
     v1_id: Optional[str] = None  # Store V1 ID for mapping
 
 
+# Column order of rows built by UserManager._build_user_row
+_USER_COLUMNS = (
+    "first_name", "middle_name", "last_name", "email", "phone_number", "password",
+    "is_password_set", "profile_picture", "type", "is_active", "school_id",
+    "is_verified", "country",
+)
+
+_INSERT_USER_SQL = (
+    f"INSERT INTO users ({', '.join(_USER_COLUMNS)}) "
+    f"VALUES ({', '.join(':' + column for column in _USER_COLUMNS)}) "
+    "RETURNING id"
+)
+
+
 class UserManager:
     """Manages user creation and mapping between V1 and V2"""
     
@@ -46,6 +71,37 @@ class UserManager:
         self.user_mappings = {}  # Maps V1 IDs to V2 User IDs
         self.email_counter = {}  # Counter for duplicate emails
         self.phone_counter = {}  # Counter for duplicate phones
+        self._claimed_emails = set()  # Emails handed out but possibly not yet inserted
+        self._claimed_phones = set()  # Phones handed out but possibly not yet inserted
+        self._created_count = 0  # Users created so far, for periodic progress logging
+        self._email_filter: Optional[BloomFilter] = None  # Emails already in V2, see warm_contact_cache
+        self._phone_filter: Optional[BloomFilter] = None  # Phones already in V2, see warm_contact_cache
+    
+    async def warm_contact_cache(self):
+        """Load emails/phones already in V2 into Bloom filters
+        
+        Contacts the filters have never seen are known to be free and skip the
+        uniqueness SELECT; possible hits are still confirmed against the database.
+        """
+        counts = await db_manager.execute_query(
+            "SELECT COUNT(email) AS emails, COUNT(phone_number) AS phones FROM users"
+        )
+        email_count = counts[0]['emails'] if counts else 0
+        phone_count = counts[0]['phones'] if counts else 0
+        email_filter = BloomFilter(email_count)
+        phone_filter = BloomFilter(phone_count)
+        
+        async for row in db_manager.stream_query(
+            "SELECT email, phone_number FROM users WHERE email IS NOT NULL OR phone_number IS NOT NULL"
+        ):
+            if row['email']:
+                email_filter.add(row['email'])
+            if row['phone_number']:
+                phone_filter.add(row['phone_number'])
+        
+        self._email_filter = email_filter
+        self._phone_filter = phone_filter
+        logger.info(f"Warmed contact cache with {email_count} emails and {phone_count} phones")
         
     async def create_user(self, user_data: UserData) -> Optional[int]:
         """Create a user in V2 database and return the user ID"""
@@ -56,33 +112,19 @@ class UserManager:
             # Handle phone uniqueness  
             phone = await self._ensure_unique_phone(user_data.phone_number, user_data.user_type)
             
-            # Prepare user data for insertion (V2 uses auto-increment int IDs, no UUID needed)
-            insert_data = {
-                "first_name": user_data.first_name,
-                "middle_name": user_data.middle_name,
-                "last_name": user_data.last_name,
-                "email": email,
-                "phone_number": phone,
-                "password": user_data.password,
-                "is_password_set": bool(user_data.password),
-                "profile_picture": user_data.profile_picture,
-                "type": user_data.user_type.value,
-                "is_active": user_data.is_active,
-                "school_id": user_data.school_id,
-                "is_verified": user_data.is_verified,
-                "country": user_data.country,
-            }
-            
-            # Remove None values
-            insert_data = {k: v for k, v in insert_data.items() if v is not None}
-            
-            # Insert user (will return auto-increment int ID)
-            user_id = await db_manager.insert_record("users", insert_data)
+            # Fixed column layout: one statement text, so the driver reuses its prepared statement
+            # (V2 uses auto-increment int IDs, no UUID needed)
+            row = self._build_user_row(user_data, email, phone)
+            user_id = await db_manager.fetch_value(_INSERT_USER_SQL, dict(zip(_USER_COLUMNS, row)))
             
             if user_id and user_data.v1_id:
                 self.user_mappings[user_data.v1_id] = user_id
-                
-            logger.info(f"Created {user_data.user_type.value} user: {user_data.first_name} {user_data.last_name} (ID: {user_id})")
+            
+            # Per-user detail only at DEBUG; INFO gets a periodic progress line
+            logger.debug("Created %s user: %s %s (ID: %s)", _TYPE_VALUES[user_data.user_type],
+                         user_data.first_name, user_data.last_name, user_id)
+            if user_id:
+                self._log_progress(1)
             return user_id
             
         except Exception as e:
@@ -90,18 +132,153 @@ class UserManager:
             logger.error(f"User data: {user_data}")
             return None
     
+    async def create_users_bulk(self, users: List[UserData],
+                                concurrency: int = MIGRATION_CONCURRENCY) -> List[Optional[int]]:
+        """Create many users, returning user IDs in input order
+        
+        Large batches are loaded with COPY; smaller ones fan out create_user concurrently.
+        """
+        if len(users) < BULK_COPY_THRESHOLD:
+            return await self._create_users_concurrently(users, concurrency)
+        
+        rows = await self._build_user_rows(users)
+        valid_rows = [row for row in rows if row is not None]
+        
+        try:
+            inserted_ids = await db_manager.reserve_ids("users", len(valid_rows))
+            await db_manager.copy_records(
+                "users",
+                ["id", *_USER_COLUMNS],
+                [(user_id, *row) for user_id, row in zip(inserted_ids, valid_rows)]
+            )
+        except Exception as e:
+            # COPY is all-or-nothing; retry row by row so one bad record doesn't sink the batch
+            logger.warning(f"COPY into users failed ({e}), falling back to row-by-row inserts")
+            inserted_ids = await self._insert_user_rows(valid_rows, concurrency)
+        
+        # Users whose row could not be built keep a None ID in their input position
+        inserted = iter(inserted_ids)
+        user_ids = [None if row is None else next(inserted) for row in rows]
+        
+        for user_data, user_id in zip(users, user_ids):
+            if user_id and user_data.v1_id:
+                self.user_mappings[user_data.v1_id] = user_id
+        
+        created = sum(1 for user_id in user_ids if user_id)
+        logger.info(f"Bulk created {created}/{len(users)} users")
+        self._log_progress(created)
+        return user_ids
+    
+    def _log_progress(self, created: int):
+        """Count created users and log progress every USER_PROGRESS_LOG_INTERVAL users"""
+        before = self._created_count
+        self._created_count += created
+        if self._created_count // USER_PROGRESS_LOG_INTERVAL > before // USER_PROGRESS_LOG_INTERVAL:
+            logger.info("Created %d users so far", self._created_count)
+    
+    async def _create_users_concurrently(self, users: List[UserData], concurrency: int) -> List[Optional[int]]:
+        """Fan create_user out over the connection pool, bounded by concurrency"""
+        return await gather_with_concurrency((self.create_user(user_data) for user_data in users), concurrency)
+    
+    async def _build_user_rows(self, users: List[UserData]) -> List[Optional[tuple]]:
+        """Resolve unique emails/phones for a batch with two lookups and build insert rows
+        
+        A user whose row cannot be built gets None so the rest of the batch still loads.
+        """
+        # Only contacts the warm cache can't rule out need a database lookup
+        emails = [email for email in {user_data.email for user_data in users if user_data.email}
+                  if self._email_filter is None or email in self._email_filter]
+        phones = [phone for phone in {self._clean_phone(user_data.phone_number) for user_data in users if user_data.phone_number}
+                  if self._phone_filter is None or phone in self._phone_filter]
+        
+        existing_emails = set()
+        if emails:
+            existing = await db_manager.execute_query(
+                "SELECT email FROM users WHERE email = ANY(:emails)",
+                {"emails": emails}
+            )
+            existing_emails = {row['email'] for row in existing}
+        
+        existing_phones = set()
+        if phones:
+            existing = await db_manager.execute_query(
+                "SELECT phone_number FROM users WHERE phone_number = ANY(:phones)",
+                {"phones": phones}
+            )
+            existing_phones = {row['phone_number'] for row in existing}
+        
+        rows = []
+        for user_data in users:
+            try:
+                email = None
+                if user_data.email:
+                    email = self._claim_email(user_data.email, user_data.user_type,
+                                              user_data.email in existing_emails)
+                
+                phone = None
+                if user_data.phone_number:
+                    clean_phone = self._clean_phone(user_data.phone_number)
+                    phone = self._claim_phone(clean_phone, clean_phone in existing_phones)
+                
+                rows.append(self._build_user_row(user_data, email, phone))
+            except Exception as e:
+                logger.error(f"Error creating user {user_data.first_name} {user_data.last_name}: {e}")
+                logger.error(f"User data: {user_data}")
+                rows.append(None)
+        
+        return rows
+    
+    async def _insert_user_rows(self, rows: List[tuple], concurrency: int) -> List[Optional[int]]:
+        """Insert prepared user rows one at a time, isolating failures per row"""
+        async def insert_one(row: tuple) -> Optional[int]:
+            try:
+                return await db_manager.fetch_value(_INSERT_USER_SQL, dict(zip(_USER_COLUMNS, row)))
+            except Exception as e:
+                logger.error(f"Error creating user {row[0]} {row[2]}: {e}")
+                return None
+        
+        return await gather_with_concurrency((insert_one(row) for row in rows), concurrency)
+    
+    def _build_user_row(self, user_data: UserData, email: Optional[str], phone: Optional[str]) -> tuple:
+        """Build a users row in _USER_COLUMNS order, applying column defaults for missing values"""
+        return (
+            user_data.first_name,
+            user_data.middle_name,
+            user_data.last_name,
+            email,
+            phone,
+            user_data.password,
+            bool(user_data.password),
+            user_data.profile_picture,
+            _TYPE_VALUES[user_data.user_type],
+            True if user_data.is_active is None else user_data.is_active,
+            user_data.school_id,
+            False if user_data.is_verified is None else user_data.is_verified,
+            user_data.country or DEFAULT_VALUES["country"],
+        )
+    
     async def _ensure_unique_email(self, email: Optional[str], user_type: UserType) -> Optional[str]:
         """Ensure email is unique, handle duplicates by appending counter"""
         if not email:
             return None
             
+        # The warm cache has no false negatives, so a miss means the email is free
+        if self._email_filter is not None and email not in self._email_filter:
+            return self._claim_email(email, user_type, False)
+            
         # Check if email already exists
         existing = await db_manager.execute_query(
             "SELECT id FROM users WHERE email = :email LIMIT 1",
             {"email": email}
         )
         
-        if not existing:
+        return self._claim_email(email, user_type, bool(existing))
+    
+    def _claim_email(self, email: str, user_type: UserType, exists: bool) -> str:
+        """Claim an email for a new user, generating a counter variant if it is taken"""
+        # Concurrent creations may have claimed the email before inserting it
+        if not exists and email not in self._claimed_emails:
+            self._claimed_emails.add(email)
             return email
             
         # Email exists, create a unique variant
@@ -110,9 +287,10 @@ class UserManager:
         else:
             self.email_counter[email] += 1
             
-        # Split email to insert counter before @
-        local_part, domain = email.split('@', 1)
-        unique_email = f"{local_part}+{user_type.value.lower()}{self.email_counter[email]}@{domain}"
+        # Insert counter before @; malformed V1 emails without one just get it appended
+        local_part, at, domain = email.partition('@')
+        unique_email = f"{local_part}+{_TYPE_LOWER[user_type]}{self.email_counter[email]}{at}{domain}"
+        self._claimed_emails.add(unique_email)
         
         logger.warning(f"Email {email} already exists, using {unique_email}")
         return unique_email
@@ -123,7 +301,10 @@ class UserManager:
             return None
             
         # Clean phone number (remove spaces, dashes, etc.)
-        clean_phone = ''.join(filter(str.isdigit, phone))
+        clean_phone = self._clean_phone(phone)
+        
+        if self._phone_filter is not None and clean_phone not in self._phone_filter:
+            return self._claim_phone(clean_phone, False)
         
         # Check if phone already exists
         existing = await db_manager.execute_query(
@@ -131,7 +312,12 @@ class UserManager:
             {"phone": clean_phone}
         )
         
-        if not existing:
+        return self._claim_phone(clean_phone, bool(existing))
+    
+    def _claim_phone(self, clean_phone: str, exists: bool) -> str:
+        """Claim a cleaned phone for a new user, generating a counter variant if it is taken"""
+        if not exists and clean_phone not in self._claimed_phones:
+            self._claimed_phones.add(clean_phone)
             return clean_phone
             
         # Phone exists, create a unique variant
@@ -141,64 +327,52 @@ class UserManager:
             self.phone_counter[clean_phone] += 1
             
         unique_phone = f"{clean_phone}{self.phone_counter[clean_phone]}"
+        self._claimed_phones.add(unique_phone)
         
         logger.warning(f"Phone {clean_phone} already exists, using {unique_phone}")
         return unique_phone
     
-    async def create_teacher_user(self, v1_teacher: Dict[str, Any], school_id: int) -> Optional[int]:
-        """Create user for V1 teacher record"""
-        user_data = UserData(
-            first_name=v1_teacher.get('firstName', ''),
-            middle_name=v1_teacher.get('middleName'),
-            last_name=v1_teacher.get('lastName', ''),
-            email=v1_teacher.get('email'),
-            phone_number=v1_teacher.get('phoneNumber'),
-            password=v1_teacher.get('password'),
-            user_type=UserType.TEACHER,
+    @staticmethod
+    def _clean_phone(phone: str) -> str:
+        """Strip everything but digits from a phone number"""
+        return _NON_DIGIT_RE.sub('', phone)
+    
+    async def create_many(self, records: List[Dict[str, Any]], user_type: UserType, school_id: int,
+                          concurrency: int = MIGRATION_CONCURRENCY) -> List[Optional[int]]:
+        """Create users for many V1 records of one type and school, returning IDs in input order"""
+        users = [self._to_user_data(record, user_type, school_id) for record in records]
+        return await self.create_users_bulk(users, concurrency)
+    
+    def _to_user_data(self, v1_record: Dict[str, Any], user_type: UserType, school_id: int) -> UserData:
+        """Build UserData for a V1 teacher, parent or student record"""
+        # Students in V1 might not have email/phone/password, that's ok
+        is_student = user_type == UserType.STUDENT
+        
+        return UserData(
+            first_name=v1_record.get('firstName', ''),
+            middle_name=v1_record.get('middleName'),
+            last_name=v1_record.get('lastName', ''),
+            email=None if is_student else v1_record.get('email'),
+            phone_number=None if is_student else v1_record.get('phoneNumber'),
+            password=None if is_student else v1_record.get('password'),
+            user_type=user_type,
             school_id=school_id,
-            profile_picture=v1_teacher.get('profileImage'),
-            is_active=not v1_teacher.get('isDeleted', False),
-            v1_id=v1_teacher['id']
+            profile_picture=v1_record.get('profileImage'),
+            is_active=not v1_record.get('isDeleted', False),
+            v1_id=v1_record['id']
         )
-        
-        return await self.create_user(user_data)
+    
+    async def create_teacher_user(self, v1_teacher: Dict[str, Any], school_id: int) -> Optional[int]:
+        """Create user for V1 teacher record"""
+        return await self.create_user(self._to_user_data(v1_teacher, UserType.TEACHER, school_id))
     
     async def create_parent_user(self, v1_parent: Dict[str, Any], school_id: int) -> Optional[int]:
         """Create user for V1 parent record"""
-        user_data = UserData(
-            first_name=v1_parent.get('firstName', ''),
-            middle_name=v1_parent.get('middleName'),
-            last_name=v1_parent.get('lastName', ''),
-            email=v1_parent.get('email'),
-            phone_number=v1_parent.get('phoneNumber'),
-            password=v1_parent.get('password'),
-            user_type=UserType.PARENT,
-            school_id=school_id,
-            profile_picture=v1_parent.get('profileImage'),
-            is_active=not v1_parent.get('isDeleted', False),
-            v1_id=v1_parent['id']
-        )
-        
-        return await self.create_user(user_data)
+        return await self.create_user(self._to_user_data(v1_parent, UserType.PARENT, school_id))
     
     async def create_student_user(self, v1_student: Dict[str, Any], school_id: int) -> Optional[int]:
         """Create user for V1 student record"""
-        # Students in V1 might not have email/password, that's ok
-        user_data = UserData(
-            first_name=v1_student.get('firstName', ''),
-            middle_name=v1_student.get('middleName'),
-            last_name=v1_student.get('lastName', ''),
-            email=None,  # Students typically don't have emails in V1
-            phone_number=None,  # Students typically don't have phones in V1
-            password=None,  # Students typically don't have passwords in V1
-            user_type=UserType.STUDENT,
-            school_id=school_id,
-            profile_picture=v1_student.get('profileImage'),
-            is_active=not v1_student.get('isDeleted', False),
-            v1_id=v1_student['id']
-        )
-        
-        return await self.create_user(user_data)
+        return await self.create_user(self._to_user_data(v1_student, UserType.STUDENT, school_id))
     
     def get_v2_user_id(self, v1_id: str) -> Optional[int]:
         """Get V2 user ID from V1 ID"""
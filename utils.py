@@ -2,21 +2,60 @@
 Simple utility functions for the migration system
 """
 
+import asyncio
+import atexit
+import hashlib
 import logging
+import math
+import queue
+import sys
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Awaitable, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+LOG_FILE_BUFFER_RECORDS = 256
+
+# Pass as @dataclass(**DATACLASS_SLOTS): slotted instances on Python 3.10+, plain ones before
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+# Background listener that owns the log handlers, set up once per process
+_log_listener: Optional[QueueListener] = None
 
 
 def setup_logging(level: str = "INFO"):
-    """Setup logging configuration"""
-    logging.basicConfig(
-        level=getattr(logging, level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(f'migration_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
-        ]
-    )
+    """Setup logging configuration
+    
+    Records are queued by the logging call and written by a background listener
+    thread, so console and file I/O never block the migration's event loop.
+    Repeated calls only adjust the level; the log file is opened once.
+    """
+    global _log_listener
+    
+    root_logger = logging.getLogger()
+    root_logger.setLevel(getattr(logging, level.upper()))
+    
+    if _log_listener is not None:
+        return
+    
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(f'migration_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
+    handlers = [
+        logging.StreamHandler(),
+        # Batch file writes; errors are flushed straight away
+        MemoryHandler(LOG_FILE_BUFFER_RECORDS, flushLevel=logging.ERROR, target=file_handler)
+    ]
+    for handler in handlers + [file_handler]:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)  # Drain queued records on exit
+    
+    root_logger.addHandler(QueueHandler(log_queue))
 
 
 def create_backup() -> str:
@@ -37,4 +76,39 @@ def validate_migration(results: Dict[str, Any]) -> bool:
             total_migrated += stats['migrated']
             total_failed += stats['failed']
     
-    return total_failed == 0 and total_migrated > 0
\ No newline at end of file
+    return total_failed == 0 and total_migrated > 0
+
+
+async def gather_with_concurrency(aws: Iterable[Awaitable[T]], limit: int) -> List[T]:
+    """Await coroutines concurrently with at most `limit` in flight, preserving order"""
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+    
+    return await asyncio.gather(*(run(aw) for aw in aws))
+
+
+class BloomFilter:
+    """Compact set membership test with no false negatives and a bounded false positive rate"""
+    
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, value: str) -> Iterable[int]:
+        """Derive hash_count bit positions from one digest (double hashing)"""
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * step) % self.size for i in range(self.hash_count))
+    
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
@@ -3,27 +3,184 @@ Enhanced validation utilities for V1 to V2 migration
 Provides comprehensive validation, data cleaning, and error handling
 """
 
+import asyncio
 import logging
 import re
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List, Tuple
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional, List, NamedTuple, Tuple, Union
 from dataclasses import dataclass
-from enum import Enum
+from functools import lru_cache
+from itertools import chain, islice
+
+import pandas as pd
 
 from db_utils import db_manager
 from migration_session import get_migration_session
 from config import CLASS_LEVELS, DEFAULT_CURRICULUM_ID, DEFAULT_GRADE_SYSTEM_ID
+from utils import DATACLASS_SLOTS
 
 logger = logging.getLogger(__name__)
 
+VALIDATION_SAMPLE_LIMIT = 100  # Issues reported per check; the rest are summarised by count
+
+# V1 tables whose rows must reference a school
+_SCHOOL_REF_TABLES = ("Teacher", "Parent", "Student")
+
+# Non-deleted V1 schools, shared by every school reference check in a query
+_LIVE_SCHOOLS_CTE = 'live_schools AS (SELECT id FROM "School" WHERE isDeleted = false)'
+
+# Substrings of common Kenyan female first names, matched in a single scan
+_FEMALE_NAME_RE = re.compile('|'.join(['mary', 'jane', 'grace', 'faith', 'mercy', 'joy', 'ann', 'lucy']))
+
+# Parent relationship keywords, matched case-insensitively without lowercasing the input
+_FATHER_RE = re.compile('father|dad', re.IGNORECASE)
+_MOTHER_RE = re.compile('mother|mom|mum', re.IGNORECASE)
+
+_PHONE_PATTERN = re.compile(r'^\+?[1-9]\d{1,14}$')  # Basic international format
+_NON_PHONE_CHAR_RE = re.compile(r'[^\d+]')
+
+# Translation table deleting every ASCII character except digits and '+'
+_PHONE_STRIP_TABLE = {code: None for code in range(128) if chr(code) not in '0123456789+'}
+
+# School level lookups, built once from config instead of on every call
+_CLASS_LEVEL_ITEMS = tuple(CLASS_LEVELS.items())
+_EXTENDED_LEVEL_PATTERNS = tuple(
+    (pattern, level_id) for pattern, level_id in (
+        ('pre-primary', CLASS_LEVELS.get('pre primary')),
+        ('preprimary', CLASS_LEVELS.get('pre primary')),
+        ('pp', CLASS_LEVELS.get('pre primary')),
+        ('primary', CLASS_LEVELS.get('primary')),
+        ('pri', CLASS_LEVELS.get('primary')),
+        ('junior', CLASS_LEVELS.get('junior secondary')),
+        ('junior secondary', CLASS_LEVELS.get('junior secondary')),
+        ('jss', CLASS_LEVELS.get('junior secondary')),
+        ('secondary', CLASS_LEVELS.get('senior secondary')),
+        ('senior secondary', CLASS_LEVELS.get('senior secondary')),
+        ('high', CLASS_LEVELS.get('senior secondary')),
+        ('high school', CLASS_LEVELS.get('senior secondary')),
+    ) if level_id
+)
+
+
+_ISSUE_MESSAGES = {
+    'SCHOOL_NO_NAME': "School ID {entity_id} has no name",
+    'SCHOOL_NO_EMAIL': "School '{name}' (ID: {entity_id}) has no email",
+    'SCHOOL_NO_CODE': "School '{name}' (ID: {entity_id}) has no school code",
+    'NO_SCHOOL': "{entity_type} '{name}' (ID: {entity_id}) has no school assigned",
+    'DELETED_SCHOOL': "{entity_type} '{name}' (ID: {entity_id}) references non-existent or deleted school ID: {school_id}",
+    'INVALID_PARENT': "{entity_type} '{name}' (ID: {entity_id}) references non-existent or deleted parent ID: {parent_id}",
+    'NO_CURRICULUM': "School V2 ID {entity_id} has no curriculum assigned",
+    'INVALID_SCHOOL_REFERENCE': "{entity_type} V2 User ID {entity_id} has invalid school reference: {school_id}",
+    'MORE_ISSUES': "... and {count} more {entity_type} with {problem}",
+}
+
+
+class ValidationIssue(NamedTuple):
+    """A validation problem, rendered to a message only when str() is called"""
+    code: str
+    entity_type: str
+    entity_id: Any
+    extra: Dict[str, Any]
+    
+    def __str__(self) -> str:
+        return _ISSUE_MESSAGES[self.code].format(entity_type=self.entity_type, entity_id=self.entity_id, **self.extra)
+
+
+def _sample_issues(issues: Iterable[ValidationIssue], total: int, entity_type: str,
+                   problem: str) -> List[ValidationIssue]:
+    """Keep at most VALIDATION_SAMPLE_LIMIT issues and summarise the rest by count"""
+    sample = list(islice(issues, VALIDATION_SAMPLE_LIMIT))
+    if total > len(sample):
+        sample.append(ValidationIssue('MORE_ISSUES', entity_type, None, {
+            'count': total - len(sample), 'problem': problem}))
+    return sample
+
+
+def _clean_phone_number(phone: str) -> str:
+    """Remove everything except digits and '+' from a phone number"""
+    phone = phone.strip()
+    if phone.isascii():
+        return phone.translate(_PHONE_STRIP_TABLE)
+    
+    # \d also matches non-ASCII digits, which the table doesn't cover
+    return _NON_PHONE_CHAR_RE.sub('', phone)
+
+
+@lru_cache(maxsize=4096)
+def _kenya_phone_correction(phone: str) -> Optional[str]:
+    """Correct a Kenyan phone number to +254 format; cached as the same numbers recur across rows"""
+    # Remove all non-digits except +
+    cleaned = _clean_phone_number(phone)
+    
+    # Handle Kenyan numbers
+    if cleaned.startswith('0'):
+        # Local format: 0712345678 -> +254712345678
+        if len(cleaned) == 10:
+            return f"+254{cleaned[1:]}"
+    elif cleaned.startswith('254'):
+        # Missing +: 254712345678 -> +254712345678
+        if len(cleaned) == 12:
+            return f"+{cleaned}"
+    elif cleaned.startswith('+254'):
+        # Already correct format
+        if len(cleaned) == 13:
+            return cleaned
+    
+    # For other patterns, validate as international
+    if _PHONE_PATTERN.match(cleaned):
+        return cleaned
+    
+    return None
+
 
-@dataclass
+def map_parent_type(relationship: Optional[str]) -> str:
+    """Map a V1 parent relationship to a V2 parent type"""
+    if not relationship:
+        return 'GUARDIAN'
+    
+    # Father keywords win over mother keywords wherever they appear, as before
+    if _FATHER_RE.search(relationship):
+        return 'FATHER'
+    elif _MOTHER_RE.search(relationship):
+        return 'MOTHER'
+    else:
+        return 'GUARDIAN'
+
+
+@lru_cache(maxsize=4096)
+def _map_school_level(school_level: str) -> Optional[int]:
+    """Map a school level label to a class level ID; cached as schools share a few labels"""
+    level_lower = school_level.lower().strip()
+    
+    # Direct mapping from config
+    for key, level_id in _CLASS_LEVEL_ITEMS:
+        if key in level_lower or level_lower in key:
+            return level_id
+    
+    # Extended mapping for common variations
+    for pattern, level_id in _EXTENDED_LEVEL_PATTERNS:
+        if pattern in level_lower:
+            return level_id
+    
+    return None
+
+
+@dataclass(**DATACLASS_SLOTS)
 class ValidationResult:
     """Result of a validation check"""
     is_valid: bool
-    errors: List[str]
-    warnings: List[str]
+    errors: List[Union[str, ValidationIssue]]
+    warnings: List[Union[str, ValidationIssue]]
     details: Dict[str, Any]
+    
+    def format_errors(self) -> List[str]:
+        """Render errors as messages"""
+        return [str(error) for error in self.errors]
+    
+    def format_warnings(self) -> List[str]:
+        """Render warnings as messages"""
+        return [str(warning) for warning in self.warnings]
 
 
 class MigrationValidator:
@@ -37,39 +194,25 @@ class MigrationValidator:
         """Validate V1 data integrity before migration"""
         logger.info("Validating V1 data integrity...")
         
-        errors = []
-        warnings = []
-        details = {}
-        
-        # Check schools have required data
-        school_validation = await self._validate_v1_schools()
-        errors.extend(school_validation.errors)
-        warnings.extend(school_validation.warnings)
-        details["schools"] = school_validation.details
-        
-        # Check teacher-school relationships
-        teacher_validation = await self._validate_v1_teacher_school_refs()
-        errors.extend(teacher_validation.errors)
-        warnings.extend(teacher_validation.warnings)
-        details["teachers"] = teacher_validation.details
-        
-        # Check parent-school relationships
-        parent_validation = await self._validate_v1_parent_school_refs()
-        errors.extend(parent_validation.errors)
-        warnings.extend(parent_validation.warnings)
-        details["parents"] = parent_validation.details
-        
-        # Check student-school relationships
-        student_validation = await self._validate_v1_student_school_refs()
-        errors.extend(student_validation.errors)
-        warnings.extend(student_validation.warnings)
-        details["students"] = student_validation.details
-        
-        # Check student-parent relationships
-        student_parent_validation = await self._validate_v1_student_parent_refs()
-        errors.extend(student_parent_validation.errors)
-        warnings.extend(student_parent_validation.warnings)
-        details["student_parent_relationships"] = student_parent_validation.details
+        # The checks are independent read-only queries, so run them concurrently
+        school_validation, ref_validations, student_parent_validation = await asyncio.gather(
+            self._validate_v1_schools(),             # Schools have required data
+            self._validate_v1_school_refs(),         # Teacher/parent/student-school relationships
+            self._validate_v1_student_parent_refs()  # Student-parent relationships
+        )
+        
+        sections = {
+            "schools": school_validation,
+            "teachers": ref_validations["Teacher"],
+            "parents": ref_validations["Parent"],
+            "students": ref_validations["Student"],
+            "student_parent_relationships": student_parent_validation,
+        }
+        
+        # Merge in one pass rather than growing the lists section by section
+        errors = list(chain.from_iterable(validation.errors for validation in sections.values()))
+        warnings = list(chain.from_iterable(validation.warnings for validation in sections.values()))
+        details = {section: validation.details for section, validation in sections.items()}
         
         return ValidationResult(
             is_valid=len(errors) == 0,
@@ -80,215 +223,173 @@ class MigrationValidator:
     
     async def _validate_v1_schools(self) -> ValidationResult:
         """Validate V1 schools have required data"""
-        query = """
-            SELECT id, schoolName, email, schoolCode, isDeleted
+        # Count problems server-side and only fetch a sample of offending rows for messages
+        counts_query = """
+            SELECT
+                COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE COALESCE(schoolName, '') = '') AS without_name,
+                COUNT(*) FILTER (WHERE COALESCE(email, '') = '') AS without_email,
+                COUNT(*) FILTER (WHERE COALESCE(schoolCode, '') = '') AS without_code
             FROM "School"
             WHERE isDeleted = false
         """
-        
-        schools = await db_manager.execute_query(query, engine_version="v1")
-        
-        errors = []
-        warnings = []
-        
-        schools_without_email = 0
-        schools_without_code = 0
-        schools_without_name = 0
-        
-        for school in schools:
-            school_id = school['id']
-            school_name = school.get('schoolname', 'Unknown')
-            
-            if not school.get('schoolname'):
-                errors.append(f"School ID {school_id} has no name")
-                schools_without_name += 1
-            
-            if not school.get('email'):
-                warnings.append(f"School '{school_name}' (ID: {school_id}) has no email")
-                schools_without_email += 1
-            
-            if not school.get('schoolcode'):
-                warnings.append(f"School '{school_name}' (ID: {school_id}) has no school code")
-                schools_without_code += 1
-        
-        details = {
-            "total_schools": len(schools),
-            "schools_without_email": schools_without_email,
-            "schools_without_code": schools_without_code,
-            "schools_without_name": schools_without_name
-        }
-        
-        return ValidationResult(
-            is_valid=len(errors) == 0,
-            errors=errors,
-            warnings=warnings,
-            details=details
+        # Each problem gets its own limited sample so warning rows can't crowd out the blocking error
+        sample_query = "\n            UNION ALL\n            ".join(
+            f"""(SELECT '{problem}' AS problem, id, schoolName
+                FROM "School"
+                WHERE isDeleted = false AND COALESCE({column}, '') = ''
+                LIMIT :limit)"""
+            for problem, column in (('no_name', 'schoolName'), ('no_email', 'email'), ('no_code', 'schoolCode'))
         )
-    
-    async def _validate_v1_teacher_school_refs(self) -> ValidationResult:
-        """Validate teachers reference valid schools"""
-        query = """
-            SELECT t.id, t.firstName, t.lastName, t.schoolId, s.schoolName
-            FROM "Teacher" t
-            LEFT JOIN "School" s ON t.schoolId = s.id
-            WHERE t.isDeleted = false
-        """
-        
-        teachers = await db_manager.execute_query(query, engine_version="v1")
-        
-        errors = []
-        warnings = []
-        
-        teachers_without_school = 0
-        teachers_with_deleted_school = 0
-        
-        for teacher in teachers:
-            teacher_name = f"{teacher.get('firstname', '')} {teacher.get('lastname', '')}"
-            teacher_id = teacher['id']
-            school_id = teacher.get('schoolid')
-            
-            if not school_id:
-                errors.append(f"Teacher '{teacher_name}' (ID: {teacher_id}) has no school assigned")
-                teachers_without_school += 1
-                continue
-            
-            if not teacher.get('schoolname'):
-                errors.append(f"Teacher '{teacher_name}' (ID: {teacher_id}) references non-existent or deleted school ID: {school_id}")
-                teachers_with_deleted_school += 1
-        
-        details = {
-            "total_teachers": len(teachers),
-            "teachers_without_school": teachers_without_school,
-            "teachers_with_deleted_school": teachers_with_deleted_school
-        }
         
-        return ValidationResult(
-            is_valid=len(errors) == 0,
-            errors=errors,
-            warnings=warnings,
-            details=details
+        counts, schools = await asyncio.gather(
+            db_manager.execute_query(counts_query, engine_version="v1"),
+            db_manager.execute_query(sample_query, {"limit": VALIDATION_SAMPLE_LIMIT}, engine_version="v1")
         )
-    
-    async def _validate_v1_parent_school_refs(self) -> ValidationResult:
-        """Validate parents reference valid schools"""
-        query = """
-            SELECT p.id, p.firstName, p.lastName, p.schoolId, s.schoolName
-            FROM "Parent" p
-            LEFT JOIN "School" s ON p.schoolId = s.id
-            WHERE p.isDeleted = false
-        """
-        
-        parents = await db_manager.execute_query(query, engine_version="v1")
-        
-        errors = []
-        warnings = []
+        counts = counts[0]
         
-        parents_without_school = 0
-        parents_with_deleted_school = 0
-        
-        for parent in parents:
-            parent_name = f"{parent.get('firstname', '')} {parent.get('lastname', '')}"
-            parent_id = parent['id']
-            school_id = parent.get('schoolid')
-            
-            if not school_id:
-                errors.append(f"Parent '{parent_name}' (ID: {parent_id}) has no school assigned")
-                parents_without_school += 1
-                continue
-            
-            if not parent.get('schoolname'):
-                errors.append(f"Parent '{parent_name}' (ID: {parent_id}) references non-existent or deleted school ID: {school_id}")
-                parents_with_deleted_school += 1
+        errors = _sample_issues(
+            (ValidationIssue('SCHOOL_NO_NAME', 'School', school['id'], {})
+             for school in schools if school['problem'] == 'no_name'),
+            counts['without_name'], 'schools', 'no name'
+        )
+        warnings = _sample_issues(
+            (ValidationIssue('SCHOOL_NO_EMAIL', 'School', school['id'], {'name': school.get('schoolname', 'Unknown')})
+             for school in schools if school['problem'] == 'no_email'),
+            counts['without_email'], 'schools', 'no email'
+        ) + _sample_issues(
+            (ValidationIssue('SCHOOL_NO_CODE', 'School', school['id'], {'name': school.get('schoolname', 'Unknown')})
+             for school in schools if school['problem'] == 'no_code'),
+            counts['without_code'], 'schools', 'no school code'
+        )
         
         details = {
-            "total_parents": len(parents),
-            "parents_without_school": parents_without_school,
-            "parents_with_deleted_school": parents_with_deleted_school
+            "total_schools": counts['total'],
+            "schools_without_email": counts['without_email'],
+            "schools_without_code": counts['without_code'],
+            "schools_without_name": counts['without_name']
         }
         
         return ValidationResult(
-            is_valid=len(errors) == 0,
+            is_valid=counts['without_name'] == 0,
             errors=errors,
             warnings=warnings,
             details=details
         )
     
-    async def _validate_v1_student_school_refs(self) -> ValidationResult:
-        """Validate students reference valid schools"""
-        query = """
-            SELECT st.id, st.firstName, st.lastName, st.schoolId, s.schoolName
-            FROM "Student" st
-            LEFT JOIN "School" s ON st.schoolId = s.id
-            WHERE st.isDeleted = false
-        """
-        
-        students = await db_manager.execute_query(query, engine_version="v1")
+    async def _validate_v1_school_refs(self) -> Dict[str, ValidationResult]:
+        """Validate teachers, parents and students reference valid schools, keyed by V1 table"""
+        # One round-trip for the counts of all three tables and one for a sample of offending rows.
+        # Both resolve school existence against a single live_schools set instead of joining
+        # the full School table once per entity table.
+        counts_query = """
+            WITH {live_schools},
+            refs AS (
+                {refs}
+            )
+            SELECT
+                kind,
+                COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE school_id IS NULL) AS without_school,
+                COUNT(*) FILTER (WHERE school_id IS NOT NULL AND school_exists IS NULL) AS with_deleted_school
+            FROM refs
+            GROUP BY kind
+        """.format(live_schools=_LIVE_SCHOOLS_CTE, refs="\n                UNION ALL\n                ".join(
+            f"""SELECT '{table}' AS kind, e.schoolId AS school_id, s.id AS school_exists
+                FROM "{table}" e LEFT JOIN live_schools s ON e.schoolId = s.id
+                WHERE e.isDeleted = false"""
+            for table in _SCHOOL_REF_TABLES
+        ))
+        sample_query = f"""
+            WITH {_LIVE_SCHOOLS_CTE}
+            """ + "\n            UNION ALL\n            ".join(
+            f"""(SELECT '{table}' AS kind, e.id, CONCAT_WS(' ', e.firstName, e.lastName) AS full_name, e.schoolId
+             FROM "{table}" e LEFT JOIN live_schools s ON e.schoolId = s.id
+             WHERE e.isDeleted = false AND s.id IS NULL
+             LIMIT :limit)"""
+            for table in _SCHOOL_REF_TABLES
+        )
         
-        errors = []
-        warnings = []
+        count_rows, sample_rows = await asyncio.gather(
+            db_manager.execute_query(counts_query, engine_version="v1"),
+            db_manager.execute_query(sample_query, {"limit": VALIDATION_SAMPLE_LIMIT}, engine_version="v1")
+        )
         
-        students_without_school = 0
-        students_with_deleted_school = 0
+        counts_by_kind = {row['kind']: row for row in count_rows}
+        samples_by_kind: Dict[str, List[Dict[str, Any]]] = {table: [] for table in _SCHOOL_REF_TABLES}
+        for row in sample_rows:
+            samples_by_kind[row['kind']].append(row)
         
-        for student in students:
-            student_name = f"{student.get('firstname', '')} {student.get('lastname', '')}"
-            student_id = student['id']
-            school_id = student.get('schoolid')
+        results = {}
+        for table in _SCHOOL_REF_TABLES:
+            plural = f"{table.lower()}s"
+            counts = counts_by_kind.get(table, {'total': 0, 'without_school': 0, 'with_deleted_school': 0})
+            rows = samples_by_kind[table]
             
-            if not school_id:
-                errors.append(f"Student '{student_name}' (ID: {student_id}) has no school assigned")
-                students_without_school += 1
-                continue
+            invalid = counts['without_school'] + counts['with_deleted_school']
+            errors = _sample_issues(
+                (ValidationIssue('DELETED_SCHOOL' if row.get('schoolid') else 'NO_SCHOOL', table, row['id'], {
+                    'name': row['full_name'], 'school_id': row.get('schoolid')})
+                 for row in rows),
+                invalid, plural, 'invalid school references'
+            )
+            warnings = []
             
-            if not student.get('schoolname'):
-                errors.append(f"Student '{student_name}' (ID: {student_id}) references non-existent or deleted school ID: {school_id}")
-                students_with_deleted_school += 1
-        
-        details = {
-            "total_students": len(students),
-            "students_without_school": students_without_school,
-            "students_with_deleted_school": students_with_deleted_school
-        }
+            details = {
+                f"total_{plural}": counts['total'],
+                f"{plural}_without_school": counts['without_school'],
+                f"{plural}_with_deleted_school": counts['with_deleted_school']
+            }
+            
+            results[table] = ValidationResult(
+                is_valid=invalid == 0,
+                errors=errors,
+                warnings=warnings,
+                details=details
+            )
         
-        return ValidationResult(
-            is_valid=len(errors) == 0,
-            errors=errors,
-            warnings=warnings,
-            details=details
-        )
+        return results
     
     async def _validate_v1_student_parent_refs(self) -> ValidationResult:
         """Validate student-parent relationships"""
-        query = """
-            SELECT st.id, st.firstName, st.lastName, st.parentId, p.firstName as parent_firstname, p.lastName as parent_lastname
+        # Count problems server-side and only fetch a sample of offending rows for messages
+        counts_query = """
+            SELECT
+                COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE p.id IS NULL) AS with_invalid_parent
             FROM "Student" st
             LEFT JOIN "Parent" p ON st.parentId = p.id AND p.isDeleted = false
             WHERE st.isDeleted = false AND st.parentId IS NOT NULL
         """
+        sample_query = """
+            SELECT st.id, CONCAT_WS(' ', st.firstName, st.lastName) AS full_name, st.parentId
+            FROM "Student" st
+            LEFT JOIN "Parent" p ON st.parentId = p.id AND p.isDeleted = false
+            WHERE st.isDeleted = false AND st.parentId IS NOT NULL AND p.id IS NULL
+            LIMIT :limit
+        """
         
-        student_parent_relationships = await db_manager.execute_query(query, engine_version="v1")
+        counts, relationships = await asyncio.gather(
+            db_manager.execute_query(counts_query, engine_version="v1"),
+            db_manager.execute_query(sample_query, {"limit": VALIDATION_SAMPLE_LIMIT}, engine_version="v1")
+        )
+        counts = counts[0]
         
-        errors = []
+        errors = _sample_issues(
+            (ValidationIssue('INVALID_PARENT', 'Student', relationship['id'], {
+                'name': relationship['full_name'], 'parent_id': relationship.get('parentid')})
+             for relationship in relationships),
+            counts['with_invalid_parent'], 'students', 'invalid parent references'
+        )
         warnings = []
         
-        students_with_invalid_parent = 0
-        
-        for relationship in student_parent_relationships:
-            student_name = f"{relationship.get('firstname', '')} {relationship.get('lastname', '')}"
-            student_id = relationship['id']
-            parent_id = relationship.get('parentid')
-            
-            if parent_id and not relationship.get('parent_firstname'):
-                errors.append(f"Student '{student_name}' (ID: {student_id}) references non-existent or deleted parent ID: {parent_id}")
-                students_with_invalid_parent += 1
-        
         details = {
-            "total_student_parent_relationships": len(student_parent_relationships),
-            "students_with_invalid_parent": students_with_invalid_parent
+            "total_student_parent_relationships": counts['total'],
+            "students_with_invalid_parent": counts['with_invalid_parent']
         }
         
         return ValidationResult(
-            is_valid=len(errors) == 0,
+            is_valid=counts['with_invalid_parent'] == 0,
             errors=errors,
             warnings=warnings,
             details=details
@@ -310,12 +411,15 @@ class MigrationValidator:
         warnings = []
         
         # Check all schools have curriculums
-        schools_without_curriculum = 0
-        for school_id in session.school_mappings:
-            v2_school_id = session.school_mappings[school_id].v2_id
-            if v2_school_id not in session.school_curriculums:
-                warnings.append(f"School V2 ID {v2_school_id} has no curriculum assigned")
-                schools_without_curriculum += 1
+        uncovered_school_ids = [
+            mapping.v2_id for mapping in session.school_mappings.values()
+            if mapping.v2_id not in session.school_curriculums
+        ]
+        schools_without_curriculum = len(uncovered_school_ids)
+        warnings.extend(_sample_issues(
+            (ValidationIssue('NO_CURRICULUM', 'School', v2_school_id, {}) for v2_school_id in uncovered_school_ids),
+            schools_without_curriculum, 'schools', 'no curriculum assigned'
+        ))
         
         # Check for orphaned entities
         total_teachers = len(session.teacher_mappings)
@@ -323,23 +427,21 @@ class MigrationValidator:
         total_students = len(session.student_mappings)
         
         # Validate all entities have valid school references
-        orphaned_teachers = 0
-        for teacher_mapping in session.teacher_mappings.values():
-            if teacher_mapping.school_id not in [s.v2_id for s in session.school_mappings.values()]:
-                orphaned_teachers += 1
-                errors.append(f"Teacher V2 User ID {teacher_mapping.v2_id} has invalid school reference: {teacher_mapping.school_id}")
-        
-        orphaned_parents = 0
-        for parent_mapping in session.parent_mappings.values():
-            if parent_mapping.school_id not in [s.v2_id for s in session.school_mappings.values()]:
-                orphaned_parents += 1
-                errors.append(f"Parent V2 User ID {parent_mapping.v2_id} has invalid school reference: {parent_mapping.school_id}")
-        
-        orphaned_students = 0
-        for student_mapping in session.student_mappings.values():
-            if student_mapping.school_id not in [s.v2_id for s in session.school_mappings.values()]:
-                orphaned_students += 1
-                errors.append(f"Student V2 User ID {student_mapping.v2_id} has invalid school reference: {student_mapping.school_id}")
+        teacher_orphans = session.find_orphaned_mappings(session.teacher_mappings)
+        parent_orphans = session.find_orphaned_mappings(session.parent_mappings)
+        student_orphans = session.find_orphaned_mappings(session.student_mappings)
+        
+        for entity_type, orphans in (('Teacher', teacher_orphans), ('Parent', parent_orphans),
+                                     ('Student', student_orphans)):
+            errors.extend(_sample_issues(
+                (ValidationIssue('INVALID_SCHOOL_REFERENCE', entity_type, mapping.v2_id,
+                                 {'school_id': mapping.school_id})
+                 for mapping in orphans),
+                len(orphans), f"{entity_type.lower()}s", 'invalid school references'
+            ))
+        orphaned_teachers = len(teacher_orphans)
+        orphaned_parents = len(parent_orphans)
+        orphaned_students = len(student_orphans)
         
         details = {
             "session_id": session.session_id,
@@ -363,16 +465,16 @@ class MigrationValidator:
         )
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class EnhancedValidationResult:
     """Result of an enhanced validation operation"""
     is_valid: bool
     errors: List[str]
     warnings: List[str]
-    corrected_data: Optional[Dict[str, Any]] = None
+    corrected_data: Optional[Dict[str, Any]] = None  # Only the corrected keys; None if nothing changed
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class MigrationPrerequisites:
     """Prerequisites that must exist before migration"""
     curriculum_id: int
@@ -386,13 +488,78 @@ class EnhancedValidator:
     
     def __init__(self):
         self.email_pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
-        self.phone_pattern = re.compile(r'^\+?[1-9]\d{1,14}$')  # Basic international format
+        self.phone_pattern = _PHONE_PATTERN
+        self._email_corrections = [
+            # Fix missing .com
+            (re.compile(r'@([^.]+)$'), r'@\1.com'),
+            # Fix double @
+            (re.compile(r'@@+'), r'@'),
+            # Fix spaces
+            (re.compile(r'\s+'), ''),
+            # Fix common domain typos
+            (re.compile(r'@gmail\.co$'), '@gmail.com'),
+            (re.compile(r'@yahoo\.co$'), '@yahoo.com'),
+        ]
+        self._entity_validators = {
+            'student': self._validate_student_specific,
+            'parent': self._validate_parent_specific,
+            'teacher': self._validate_teacher_specific,
+        }
+        self._now: Optional[datetime] = None  # Snapshot taken by batch_context
+        self._mmdd: Optional[str] = None
+    
+    @contextmanager
+    def batch_context(self):
+        """Share one clock reading across a validation pass instead of reading it per row"""
+        previous = (self._now, self._mmdd)
+        if self._now is None:
+            self._now = datetime.now()
+            self._mmdd = self._now.strftime('%m%d')
+        try:
+            yield self
+        finally:
+            self._now, self._mmdd = previous
+    
+    def _current_time(self) -> datetime:
+        """Batch snapshot time when inside batch_context, otherwise now"""
+        return self._now or datetime.now()
         
     def validate_v1_school(self, v1_school: Dict[str, Any]) -> EnhancedValidationResult:
         """Comprehensive validation of V1 school data"""
+        email = (v1_school.get('email') or '').strip()
+        cleaned_phone = self._clean_phone_number(v1_school.get('phone') or '')
+        return self._validate_school(
+            v1_school,
+            email_valid=bool(self.email_pattern.match(email)),
+            cleaned_phone=cleaned_phone,
+            phone_valid=bool(self.phone_pattern.match(cleaned_phone))
+        )
+    
+    def validate_v1_schools_batch(self, v1_schools: List[Dict[str, Any]]) -> List[EnhancedValidationResult]:
+        """Validate many V1 schools, running the email/phone format checks column-wise"""
+        if not v1_schools:
+            return []
+        
+        # Vectorised format checks; only rows failing them reach the per-row correction helpers
+        df = pd.DataFrame(v1_schools, columns=['email', 'phone'])
+        emails = df['email'].fillna('').astype(str).str.strip()
+        phones = df['phone'].fillna('').astype(str).str.strip().str.replace(r'[^\d+]', '', regex=True)
+        email_valid = emails.str.match(self.email_pattern.pattern)
+        phone_valid = phones.str.match(self.phone_pattern.pattern)
+        
+        with self.batch_context():
+            return [
+                self._validate_school(v1_school, email_valid=email_ok, cleaned_phone=cleaned_phone, phone_valid=phone_ok)
+                for v1_school, email_ok, cleaned_phone, phone_ok in zip(
+                    v1_schools, email_valid.tolist(), phones.tolist(), phone_valid.tolist())
+            ]
+    
+    def _validate_school(self, v1_school: Dict[str, Any], email_valid: bool, cleaned_phone: str,
+                         phone_valid: bool) -> EnhancedValidationResult:
+        """Validate a V1 school given its precomputed email/phone format checks"""
         errors = []
         warnings = []
-        corrected_data = v1_school.copy()
+        corrections: Dict[str, Any] = {}
         
         # Required fields validation
         required_fields = ['id', 'schoolName', 'email', 'phone']
@@ -401,33 +568,32 @@ class EnhancedValidator:
                 errors.append(f"Missing required field: {field}")
         
         # Email validation and correction
-        email = v1_school.get('email', '').strip()
+        email = (v1_school.get('email') or '').strip()
         if email:
-            if not self.email_pattern.match(email):
+            if not email_valid:
                 warnings.append(f"Invalid email format: {email}")
                 # Attempt to correct common issues
                 corrected_email = self._attempt_email_correction(email)
                 if corrected_email and self.email_pattern.match(corrected_email):
-                    corrected_data['email'] = corrected_email
+                    corrections['email'] = corrected_email
                     warnings.append(f"Corrected email to: {corrected_email}")
                 else:
                     errors.append(f"Cannot correct invalid email: {email}")
         
         # Phone validation and correction
-        phone = v1_school.get('phone', '').strip()
+        phone = (v1_school.get('phone') or '').strip()
         if phone:
-            cleaned_phone = self._clean_phone_number(phone)
-            if not self.phone_pattern.match(cleaned_phone):
+            if not phone_valid:
                 warnings.append(f"Invalid phone format: {phone}")
                 # Kenya-specific phone correction
                 corrected_phone = self._attempt_kenya_phone_correction(phone)
                 if corrected_phone:
-                    corrected_data['phone'] = corrected_phone
+                    corrections['phone'] = corrected_phone
                     warnings.append(f"Corrected phone to: {corrected_phone}")
                 else:
                     errors.append(f"Cannot correct invalid phone: {phone}")
             else:
-                corrected_data['phone'] = cleaned_phone
+                corrections['phone'] = cleaned_phone
         
         # School level validation
         school_level = v1_school.get('schoolLevel', '').strip()
@@ -436,7 +602,7 @@ class EnhancedValidator:
             if mapped_level_id is None:
                 errors.append(f"Cannot map school level: {school_level}")
             else:
-                corrected_data['_mapped_level_id'] = mapped_level_id
+                corrections['_mapped_level_id'] = mapped_level_id
         else:
             errors.append("Missing school level")
         
@@ -445,23 +611,23 @@ class EnhancedValidator:
         valid_types = ['PRIVATE', 'PUBLIC', 'INTERNATIONAL']
         if school_type and school_type not in valid_types:
             warnings.append(f"Unknown school type: {school_type}, defaulting to PRIVATE")
-            corrected_data['type'] = 'PRIVATE'
+            corrections['type'] = 'PRIVATE'
         elif not school_type:
-            corrected_data['type'] = 'PRIVATE'
+            corrections['type'] = 'PRIVATE'
             warnings.append("Missing school type, defaulting to PRIVATE")
         
         # Government code validation
         gov_code = v1_school.get('schoolCode', '').strip()
         if not gov_code:
             warnings.append("Missing government code - will generate from school name")
-            corrected_data['schoolCode'] = self._generate_government_code(
+            corrections['schoolCode'] = self._generate_government_code(
                 v1_school.get('schoolName', 'SCHOOL'))
         
         return EnhancedValidationResult(
             is_valid=len(errors) == 0,
             errors=errors,
             warnings=warnings,
-            corrected_data=corrected_data
+            corrected_data=corrections or None
         )
     
     def validate_v1_user_entity(self, v1_entity: Dict[str, Any], 
@@ -469,7 +635,7 @@ class EnhancedValidator:
         """Validate V1 user entity (teacher, parent, student)"""
         errors = []
         warnings = []
-        corrected_data = v1_entity.copy()
+        corrections: Dict[str, Any] = {}
         
         # Required fields validation
         required_fields = ['id', 'firstName', 'lastName']
@@ -497,11 +663,11 @@ class EnhancedValidator:
             if not self.email_pattern.match(email):
                 corrected_email = self._attempt_email_correction(email)
                 if corrected_email:
-                    corrected_data['email'] = corrected_email
+                    corrections['email'] = corrected_email
                     warnings.append(f"Corrected email from {email} to {corrected_email}")
                 else:
                     warnings.append(f"Invalid email format: {email}")
-                    corrected_data['email'] = None
+                    corrections['email'] = None
         
         # Phone validation (if present)
         phone = v1_entity.get('phoneNumber', '').strip()
@@ -509,10 +675,10 @@ class EnhancedValidator:
             cleaned_phone = self._clean_phone_number(phone)
             corrected_phone = self._attempt_kenya_phone_correction(phone)
             if corrected_phone:
-                corrected_data['phoneNumber'] = corrected_phone
+                corrections['phoneNumber'] = corrected_phone
             else:
                 warnings.append(f"Invalid phone number: {phone}")
-                corrected_data['phoneNumber'] = None
+                corrections['phoneNumber'] = None
         
         # School ID validation
         school_id = v1_entity.get('schoolId')
@@ -520,22 +686,19 @@ class EnhancedValidator:
             errors.append("Missing school ID")
         
         # Entity-specific validations
-        if entity_type == 'student':
-            self._validate_student_specific(v1_entity, corrected_data, errors, warnings)
-        elif entity_type == 'parent':
-            self._validate_parent_specific(v1_entity, corrected_data, errors, warnings)
-        elif entity_type == 'teacher':
-            self._validate_teacher_specific(v1_entity, corrected_data, errors, warnings)
+        entity_validator = self._entity_validators.get(entity_type)
+        if entity_validator:
+            entity_validator(v1_entity, corrections, errors, warnings)
         
         return EnhancedValidationResult(
             is_valid=len(errors) == 0,
             errors=errors,
             warnings=warnings,
-            corrected_data=corrected_data
+            corrected_data=corrections or None
         )
     
     def _validate_student_specific(self, v1_student: Dict[str, Any], 
-                                  corrected_data: Dict[str, Any],
+                                  corrections: Dict[str, Any],
                                   errors: List[str], warnings: List[str]):
         """Student-specific validation"""
         # Admission number validation
@@ -549,14 +712,14 @@ class EnhancedValidator:
             # Attempt to infer from name
             estimated_gender = self._estimate_gender_from_name(
                 v1_student.get('firstName', ''))
-            corrected_data['gender'] = estimated_gender
+            corrections['gender'] = estimated_gender
             warnings.append(f"Estimated gender as {estimated_gender} based on name")
         
         # Date of birth estimation (required in V2)
         if 'dateOfBirth' not in v1_student or not v1_student['dateOfBirth']:
             # Estimate based on class level if available
             estimated_dob = self._estimate_date_of_birth(v1_student)
-            corrected_data['dateOfBirth'] = estimated_dob
+            corrections['dateOfBirth'] = estimated_dob
             warnings.append(f"Estimated date of birth as {estimated_dob}")
         
         # Parent validation
@@ -565,19 +728,19 @@ class EnhancedValidator:
             warnings.append("Student has no parent ID - will need manual parent assignment")
     
     def _validate_parent_specific(self, v1_parent: Dict[str, Any],
-                                 corrected_data: Dict[str, Any],
+                                 corrections: Dict[str, Any],
                                  errors: List[str], warnings: List[str]):
         """Parent-specific validation"""
         # Relationship mapping
         relationship = v1_parent.get('relationship', '').strip().lower()
         parent_type = self._map_parent_type(relationship)
-        corrected_data['_mapped_parent_type'] = parent_type
+        corrections['_mapped_parent_type'] = parent_type
         
         if not relationship:
             warnings.append("Missing parent relationship, defaulting to GUARDIAN")
     
     def _validate_teacher_specific(self, v1_teacher: Dict[str, Any],
-                                  corrected_data: Dict[str, Any],
+                                  corrections: Dict[str, Any],
                                   errors: List[str], warnings: List[str]):
         """Teacher-specific validation"""
         # Qualification validation
@@ -589,17 +752,17 @@ class EnhancedValidator:
         subjects = v1_teacher.get('subjects')
         if subjects:
             if isinstance(subjects, list):
-                corrected_data['_formatted_subjects'] = ', '.join(subjects)
+                corrections['_formatted_subjects'] = ', '.join(subjects)
             elif isinstance(subjects, str):
-                corrected_data['_formatted_subjects'] = subjects
+                corrections['_formatted_subjects'] = subjects
             else:
                 warnings.append(f"Invalid subjects format: {subjects}")
         
         # Employment date estimation
         if 'employmentDate' not in v1_teacher or not v1_teacher['employmentDate']:
             # Use creation date or current date
-            estimated_date = v1_teacher.get('CreatedAt', datetime.now())
-            corrected_data['employmentDate'] = estimated_date
+            estimated_date = v1_teacher['CreatedAt'] if 'CreatedAt' in v1_teacher else self._current_time()
+            corrections['employmentDate'] = estimated_date
             warnings.append(f"Estimated employment date as {estimated_date}")
     
     def _attempt_email_correction(self, email: str) -> Optional[str]:
@@ -610,20 +773,8 @@ class EnhancedValidator:
         email = email.strip().lower()
         
         # Fix common issues
-        corrections = [
-            # Fix missing .com
-            (r'@([^.]+)$', r'@\1.com'),
-            # Fix double @
-            (r'@@+', r'@'),
-            # Fix spaces
-            (r'\s+', ''),
-            # Fix common domain typos
-            (r'@gmail\.co$', '@gmail.com'),
-            (r'@yahoo\.co$', '@yahoo.com'),
-        ]
-        
-        for pattern, replacement in corrections:
-            email = re.sub(pattern, replacement, email)
+        for pattern, replacement in self._email_corrections:
+            email = pattern.sub(replacement, email)
         
         # Final validation
         if self.email_pattern.match(email):
@@ -633,69 +784,21 @@ class EnhancedValidator:
     
     def _clean_phone_number(self, phone: str) -> str:
         """Clean phone number by removing non-digits"""
-        return re.sub(r'[^\d+]', '', phone.strip())
+        return _clean_phone_number(phone)
     
     def _attempt_kenya_phone_correction(self, phone: str) -> Optional[str]:
         """Attempt to correct Kenyan phone numbers"""
         if not phone:
             return None
         
-        # Remove all non-digits except +
-        cleaned = self._clean_phone_number(phone)
-        
-        # Handle Kenyan numbers
-        if cleaned.startswith('0'):
-            # Local format: 0712345678 -> +254712345678
-            if len(cleaned) == 10:
-                return f"+254{cleaned[1:]}"
-        elif cleaned.startswith('254'):
-            # Missing +: 254712345678 -> +254712345678
-            if len(cleaned) == 12:
-                return f"+{cleaned}"
-        elif cleaned.startswith('+254'):
-            # Already correct format
-            if len(cleaned) == 13:
-                return cleaned
-        
-        # For other patterns, validate as international
-        if self.phone_pattern.match(cleaned):
-            return cleaned
-        
-        return None
+        return _kenya_phone_correction(phone)
     
     def _validate_and_map_school_level(self, school_level: str) -> Optional[int]:
         """Validate and map school level to class level ID"""
         if not school_level:
             return None
         
-        level_lower = school_level.lower().strip()
-        
-        # Direct mapping from config
-        for key, level_id in CLASS_LEVELS.items():
-            if key in level_lower or level_lower in key:
-                return level_id
-        
-        # Extended mapping for common variations
-        extended_mapping = {
-            'pre-primary': CLASS_LEVELS.get('pre primary'),
-            'preprimary': CLASS_LEVELS.get('pre primary'),
-            'pp': CLASS_LEVELS.get('pre primary'),
-            'primary': CLASS_LEVELS.get('primary'),
-            'pri': CLASS_LEVELS.get('primary'),
-            'junior': CLASS_LEVELS.get('junior secondary'),
-            'junior secondary': CLASS_LEVELS.get('junior secondary'),
-            'jss': CLASS_LEVELS.get('junior secondary'),
-            'secondary': CLASS_LEVELS.get('senior secondary'),
-            'senior secondary': CLASS_LEVELS.get('senior secondary'),
-            'high': CLASS_LEVELS.get('senior secondary'),
-            'high school': CLASS_LEVELS.get('senior secondary'),
-        }
-        
-        for pattern, level_id in extended_mapping.items():
-            if pattern in level_lower and level_id:
-                return level_id
-        
-        return None
+        return _map_school_level(school_level)
     
     def _generate_government_code(self, school_name: str) -> str:
         """Generate a government code from school name"""
@@ -705,7 +808,7 @@ class EnhancedValidator:
         base_code = ''.join(code_parts)
         
         # Add timestamp to ensure uniqueness
-        timestamp = datetime.now().strftime('%m%d')
+        timestamp = self._mmdd or datetime.now().strftime('%m%d')
         return f"{base_code}{timestamp}"
     
     def _estimate_gender_from_name(self, first_name: str) -> str:
@@ -713,19 +816,10 @@ class EnhancedValidator:
         if not first_name:
             return 'MALE'  # Default
         
-        name_lower = first_name.lower()
-        
-        # Simple heuristics for common Kenyan names
-        female_indicators = ['mary', 'jane', 'grace', 'faith', 'mercy', 'joy', 'ann', 'lucy']
-        male_indicators = ['john', 'peter', 'paul', 'david', 'james', 'michael', 'samuel']
-        
-        for indicator in female_indicators:
-            if indicator in name_lower:
-                return 'FEMALE'
-        
-        for indicator in male_indicators:
-            if indicator in name_lower:
-                return 'MALE'
+        # Simple heuristics for common Kenyan names; male indicators fall
+        # through to the same default, so only the female ones are checked
+        if _FEMALE_NAME_RE.search(first_name.lower()):
+            return 'FEMALE'
         
         # Default to MALE if uncertain
         return 'MALE'
@@ -745,42 +839,42 @@ class EnhancedValidator:
             estimated_age = 10
         
         # Calculate birth date
-        birth_year = datetime.now().year - estimated_age
+        birth_year = self._current_time().year - estimated_age
         return datetime(birth_year, 1, 1)
     
     def _map_parent_type(self, relationship: str) -> str:
         """Map V1 parent relationship to V2 parent type"""
-        if not relationship:
-            return 'GUARDIAN'
-        
-        rel_lower = relationship.lower()
-        
-        if 'father' in rel_lower or 'dad' in rel_lower:
-            return 'FATHER'
-        elif 'mother' in rel_lower or 'mom' in rel_lower or 'mum' in rel_lower:
-            return 'MOTHER'
-        else:
-            return 'GUARDIAN'
+        return map_parent_type(relationship)
 
 
 class PrerequisiteManager:
     """Manages migration prerequisites"""
     
+    def __init__(self):
+        # Prerequisites don't change within a run, so each is looked up at most once
+        self._curriculum_cache: Optional[int] = None
+        self._grade_system_cache: Optional[int] = None
+        self._class_level_cache: Dict[int, Dict[str, int]] = {}  # curriculum_id -> level name -> id
+    
+    def reset_prerequisites(self):
+        """Forget cached prerequisites so the next setup re-checks the database"""
+        self._curriculum_cache = None
+        self._grade_system_cache = None
+        self._class_level_cache.clear()
+    
     async def setup_prerequisites(self, school_ids: List[str]) -> MigrationPrerequisites:
         """Set up all prerequisites for migration"""
         logger.info("Setting up migration prerequisites...")
         
-        # Ensure curriculum exists
-        curriculum_id = await self._ensure_default_curriculum()
-        
-        # Ensure grade system exists  
-        grade_system_id = await self._ensure_default_grade_system()
-        
-        # Set up class levels
-        class_levels = await self._ensure_class_levels(curriculum_id)
-        
-        # Create academic years for schools
-        academic_years = await self._ensure_academic_years(school_ids)
+        # All prerequisite writes share one transaction and commit once
+        try:
+            async with db_manager.transaction(engine_version="v2"):
+                grade_system_id, curriculum_id, class_levels = await self._ensure_curriculum_setup()
+                academic_years = await self._ensure_academic_years(school_ids)
+        except Exception:
+            # Nothing was committed, so ids cached during the attempt are no longer valid
+            self.reset_prerequisites()
+            raise
         
         return MigrationPrerequisites(
             curriculum_id=curriculum_id,
@@ -789,18 +883,21 @@ class PrerequisiteManager:
             academic_years=academic_years
         )
     
+    async def _ensure_curriculum_setup(self) -> Tuple[int, int, Dict[str, int]]:
+        """Ensure grade system, curriculum and class levels exist, in dependency order"""
+        # The curriculum references the grade system, and class levels reference the curriculum
+        grade_system_id = await self._ensure_default_grade_system()
+        curriculum_id = await self._ensure_default_curriculum()
+        class_levels = await self._ensure_class_levels(curriculum_id)
+        
+        return grade_system_id, curriculum_id, class_levels
+    
     async def _ensure_default_curriculum(self) -> int:
         """Ensure default curriculum exists"""
-        # Check if default curriculum exists
-        existing = await db_manager.execute_query(
-            "SELECT id FROM curriculums WHERE id = :id",
-            {"id": DEFAULT_CURRICULUM_ID}
-        )
-        
-        if existing:
-            return DEFAULT_CURRICULUM_ID
+        if self._curriculum_cache is not None:
+            return self._curriculum_cache
         
-        # Create default curriculum
+        # Create default curriculum unless it exists, in a single statement
         curriculum_data = {
             "id": DEFAULT_CURRICULUM_ID,
             "name": "kenya_8_4_4_system",
@@ -810,23 +907,19 @@ class PrerequisiteManager:
             "is_active": True
         }
         
-        await db_manager.insert_record("curriculums", curriculum_data)
-        logger.info(f"Created default curriculum with ID: {DEFAULT_CURRICULUM_ID}")
+        created = await db_manager.insert_records("curriculums", [curriculum_data], on_conflict="(id) DO NOTHING")
+        if created:
+            logger.info(f"Created default curriculum with ID: {DEFAULT_CURRICULUM_ID}")
         
+        self._curriculum_cache = DEFAULT_CURRICULUM_ID
         return DEFAULT_CURRICULUM_ID
     
     async def _ensure_default_grade_system(self) -> int:
         """Ensure default grade system exists"""
-        # Check if exists
-        existing = await db_manager.execute_query(
-            "SELECT id FROM grade_systems WHERE id = :id",
-            {"id": DEFAULT_GRADE_SYSTEM_ID}
-        )
-        
-        if existing:
-            return DEFAULT_GRADE_SYSTEM_ID
+        if self._grade_system_cache is not None:
+            return self._grade_system_cache
         
-        # Create default grade system
+        # Create default grade system unless it exists, in a single statement
         grade_system_data = {
             "id": DEFAULT_GRADE_SYSTEM_ID,
             "name": "Kenya 8-4-4 Standard",
@@ -837,7 +930,10 @@ class PrerequisiteManager:
             "country": "Kenya"
         }
         
-        await db_manager.insert_record("grade_systems", grade_system_data)
+        created = await db_manager.insert_records("grade_systems", [grade_system_data], on_conflict="(id) DO NOTHING")
+        if not created:
+            self._grade_system_cache = DEFAULT_GRADE_SYSTEM_ID
+            return DEFAULT_GRADE_SYSTEM_ID
         
         # Create default grades (A, B, C, D, E)
         grades = [
@@ -848,14 +944,17 @@ class PrerequisiteManager:
             {"grade_system_id": DEFAULT_GRADE_SYSTEM_ID, "name": "E", "min_score": 0.0, "max_score": 39.9, "remark": "Fail"},
         ]
         
-        for grade_data in grades:
-            await db_manager.insert_record("grades", grade_data)
+        await db_manager.insert_records("grades", grades, on_conflict="(grade_system_id, name) DO NOTHING")
         
         logger.info(f"Created default grade system with ID: {DEFAULT_GRADE_SYSTEM_ID}")
+        self._grade_system_cache = DEFAULT_GRADE_SYSTEM_ID
         return DEFAULT_GRADE_SYSTEM_ID
     
     async def _ensure_class_levels(self, curriculum_id: int) -> Dict[str, int]:
         """Ensure class levels exist for curriculum"""
+        if curriculum_id in self._class_level_cache:
+            return dict(self._class_level_cache[curriculum_id])
+        
         level_mapping = {}
         
         # Define standard class levels for Kenya 8-4-4
@@ -867,29 +966,33 @@ class PrerequisiteManager:
             {"name": "SENIOR SECONDARY", "min_age": 17, "max_age": 19},
         ]
         
-        for level_data in levels:
-            # Check if exists
-            existing = await db_manager.execute_query(
-                "SELECT id FROM class_levels WHERE name = :name AND curriculum_id = :curriculum_id",
-                {"name": level_data["name"], "curriculum_id": curriculum_id}
-            )
-            
-            if existing:
-                level_id = existing[0]['id']
-            else:
-                # Create class level
-                insert_data = {
+        # Upsert on the (name, curriculum_id) unique key so existing and new levels both come
+        # back from one statement; the no-op update makes RETURNING include existing rows
+        rows = await db_manager.insert_records(
+            "class_levels",
+            [
+                {
                     "name": level_data["name"],
                     "min_age": level_data["min_age"],
                     "max_age": level_data["max_age"],
                     "curriculum_id": curriculum_id
                 }
-                level_id = await db_manager.insert_record("class_levels", insert_data)
-                logger.info(f"Created class level: {level_data['name']}")
-            
-            level_mapping[level_data["name"].lower()] = level_id
+                for level_data in levels
+            ],
+            returning="name, id, (xmax = 0) AS created",
+            on_conflict="(name, curriculum_id) DO UPDATE SET name = EXCLUDED.name"
+        )
+        level_ids = {}
+        for row in rows:
+            level_ids[row['name']] = row['id']
+            if row['created']:
+                logger.info(f"Created class level: {row['name']}")
+        
+        for level_data in levels:
+            level_mapping[level_data["name"].lower()] = level_ids[level_data["name"]]
         
-        return level_mapping
+        self._class_level_cache[curriculum_id] = level_mapping
+        return dict(level_mapping)
     
     async def _ensure_academic_years(self, school_ids: List[str]) -> Dict[int, int]:
         """Create academic years for schools"""
@@ -901,28 +1004,38 @@ class PrerequisiteManager:
         start_date = datetime(current_year, 1, 1)
         end_date = datetime(current_year, 12, 31)
         
-        for school_id in school_ids:
-            # Check if academic year exists for school
-            existing = await db_manager.execute_query(
-                "SELECT id FROM academic_years WHERE school_id = :school_id AND is_active = true",
-                {"school_id": school_id}
-            )
-            
-            if existing:
-                academic_year_mapping[school_id] = existing[0]['id']
-            else:
-                # Create academic year
-                year_data = {
+        if not school_ids:
+            return academic_year_mapping
+        
+        # Look up existing active academic years for every school in one query
+        existing = await db_manager.execute_query(
+            "SELECT school_id, id FROM academic_years WHERE school_id = ANY(:school_ids) AND is_active = true",
+            {"school_ids": list(school_ids)}
+        )
+        for row in existing:
+            academic_year_mapping.setdefault(row['school_id'], row['id'])
+        
+        # Create the missing ones with a single multi-row insert
+        missing = [school_id for school_id in dict.fromkeys(school_ids) if school_id not in academic_year_mapping]
+        created = await db_manager.insert_records(
+            "academic_years",
+            [
+                {
                     "name": year_name,
                     "start_date": start_date,
                     "end_date": end_date,
                     "school_id": school_id,
                     "is_active": True
                 }
-                
-                year_id = await db_manager.insert_record("academic_years", year_data)
-                academic_year_mapping[school_id] = year_id
-                logger.info(f"Created academic year for school {school_id}")
+                for school_id in missing
+            ],
+            returning="school_id, id"
+        )
+        for row in created:
+            academic_year_mapping[row['school_id']] = row['id']
+        
+        if created:
+            logger.info(f"Created academic years for {len(created)} schools")
         
         return academic_year_mapping
 